@@ -12,20 +12,30 @@ class FileReader:
         self.tiles = None
         # total number of tiles computed as sum(tile_count)
         self.total_tiles = 0
+        # number of 4x4 tiles actually in the landscape (may differ from total_tiles)
+        self.landscape_tiles = 0
         # 2D list representing the landscape (list of rows)
         self.landscape = None
 
     def read_file(self, filename):
         """Reads the input file and sets up landscape, tile counts, and targets."""
-        # Open the file and read each line
+        # Open the file and parse its lines
         with open(filename, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.rstrip('\n')
-                # skip comment lines and empty lines
-                if not line or line.strip().startswith("#"):
-                    continue
-                self.text.append(line)
-        
+            self.parse_lines(f)
+
+    def read_text(self, text):
+        """Reads a problem given as a string in the input file format."""
+        self.parse_lines(text.split('\n'))
+
+    def parse_lines(self, lines):
+        """Parses the lines of a problem and sets up landscape, tile counts, and targets."""
+        for line in lines:
+            line = line.rstrip('\n')
+            # skip comment lines and empty lines
+            if not line or line.strip().startswith("#"):
+                continue
+            self.text.append(line)
+
         # Determine the dimension of the landscape: count lines until a line starting with '{'
         dimension = self.dimension_calc(self.text)
         
@@ -36,6 +46,7 @@ class FileReader:
         
         # Build the landscape (2D array) from the first 'dimension' lines
         self.landscape = self.build_landscape(self.text[:dimension])
+        self.landscape_tiles = (len(self.landscape) // 4) * (len(self.landscape[0]) // 4)
         
         # Extract individual tiles from the landscape;
         # each tile is a 4x4 block and we stop when we have the expected total number of tiles.
@@ -140,3 +151,6 @@ class FileReader:
 
     def get_total_tiles(self):
         return self.total_tiles
+
+    def get_landscape_tiles(self):
+        return self.landscape_tiles
@@ -21,6 +21,39 @@ class Heuristic:
                     min_val = node.distColor
         return index
 
+    @staticmethod
+    def gap_score(node):
+        """
+        Beam search score of a node (lower is better), from the range of each color that
+        the FULL tiles can still uncover with the remaining OUTER/EL slots:
+          - distance of the color gap outside that range, weighted by 100,
+          - plus the distance of the gap from the middle of the range.
+        Unlike distColor, this does not reward uncovering as many bushes as early as possible.
+        """
+        outer = node.layoutTarget[0] - node.currentLayoutCount[0]
+        el = node.layoutTarget[1] - node.currentLayoutCount[1]
+        options = []
+        if el > 0:
+            options.extend([0, 1, 2, 3])
+        if outer > 0:
+            options.append(4)
+        free = [tile.contributions() for tile in node.tiles if tile.layoutName == "FULL"]
+        slots = min(max(outer, 0) + max(el, 0), len(free))
+        score = 0
+        for c in range(4):
+            gap = node.colorTarget[c] - node.currentColorCount[c]
+            least = most = 0
+            if options and slots:
+                least = sum(sorted(min(contrib[o][c] for o in options) for contrib in free)[:slots])
+                most = sum(sorted(max(contrib[o][c] for o in options) for contrib in free)[len(free) - slots:])
+            score += 100 * (max(0, least - gap) + max(0, gap - most)) + abs(2 * gap - least - most)
+        return score
+
+    @staticmethod
+    def gap_rank(nodes, k):
+        """Returns the best k nodes by gap_score, ties broken by the smaller distColor."""
+        return sorted(nodes, key=lambda node: (Heuristic.gap_score(node), node.distColor))[:k]
+
     @staticmethod
     def lcv_calc(neighbor, index):
         """
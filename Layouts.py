@@ -1,4 +1,9 @@
 class Layouts:
+    # Layout options indexed the same way as Heuristic.lcv_calc:
+    # 0-3 are the EL orientations, 4 is OUTER and 5 is FULL.
+    OPTION_NAMES = ["EL 0", "EL 1", "EL 2", "EL 3", "OUTER", "FULL"]
+    OPTION_INDEX = {name: option for option, name in enumerate(OPTION_NAMES)}
+
     @staticmethod
     def getEl(option):
         """
@@ -48,4 +53,31 @@ class Layouts:
         """
         Returns the initial layout, which is identical to the full layout.
         """
-        return ['1'] * 16
\ No newline at end of file
+        return ['1'] * 16
+
+    @staticmethod
+    def getOption(option):
+        """
+        Returns the layout for the given option (0-3: EL, 4: OUTER, 5: FULL).
+        """
+        if option < 4:
+            return Layouts.getEl(option)
+        if option == 4:
+            return Layouts.getOuter()
+        return Layouts.getFull()
+
+    @staticmethod
+    def getCategory(option):
+        """
+        Returns the layout count index for the given option, matching
+        Node.layout_number_calc (0: OUTER, 1: EL, 2: FULL).
+        """
+        if option < 4:
+            return 1
+        if option == 4:
+            return 0
+        return 2
+
+# Precomputed for every option: indices of the cells the layout leaves uncovered ('0').
+Layouts.UNCOVERED = [[j for j, cell in enumerate(Layouts.getOption(option)) if cell == '0']
+                     for option in range(6)]
@@ -0,0 +1,177 @@
+import random
+from Node import Node
+from Tile import Tile
+from Layouts import Layouts
+from SearchAlgorithm import solution_print
+
+def local_search(tiles, targets, tile_count, total_tiles, max_steps=20000, restarts=10,
+                 tabu_tenure=None, walk_prob=0.1, seed=None, fixed=None):
+    """
+    Min-conflicts local search:
+      - Start from a random assignment that already satisfies tile_count.
+      - Repeatedly swap layouts between two tiles or turn an EL tile to reduce
+        the L1 gap between the uncovered color counts and targets.
+      - Escape local minima with tabu moves, random walk steps and restarts.
+      - Tiles in fixed ({tile_index: layout option}, e.g. Presolve.fixed) keep their forced layout.
+    Prints the solution in the same format as csp_alg.
+    Returns 0 if a solution is found, -1 otherwise.
+    """
+    solution = min_conflicts(tiles, targets, tile_count, total_tiles, max_steps, restarts,
+                             tabu_tenure, walk_prob, seed, fixed)
+    if solution is None:
+        return -1
+    solution_print(solution)
+    return 0
+
+def min_conflicts(tiles, targets, tile_count, total_tiles, max_steps=20000, restarts=10,
+                  tabu_tenure=None, walk_prob=0.1, seed=None, fixed=None):
+    """
+    Runs the local search and returns the solution Node, or None if no
+    assignment meeting the targets was found within the step budget.
+      - max_steps: moves per restart.
+      - restarts: number of fresh random assignments tried after the first one.
+      - tabu_tenure: steps a moved tile stays tabu (default: a tenth of the tiles, at least 2).
+      - walk_prob: probability of taking a random move instead of the best one.
+      - fixed: {tile_index: layout option} of tiles that are never moved.
+    """
+    if sum(tile_count) != total_tiles:
+        return None
+    rng = random.Random(seed)
+    tile_array = []
+    for i in range(total_tiles):
+        tile_array.append(Tile(tiles[i], Layouts.getInitialLayout(), "FULL"))
+    contrib = [tile.contributions() for tile in tile_array]
+    if tabu_tenure is None:
+        tabu_tenure = max(2, total_tiles // 10)
+
+    for _ in range(restarts + 1):
+        assignment = random_assignment(tile_count, total_tiles, rng, fixed)
+        current = [0, 0, 0, 0]
+        for i, option in enumerate(assignment):
+            for c in range(4):
+                current[c] += contrib[i][option][c]
+        cost = gap(current, targets)
+        best_cost = cost
+        tabu_until = [0] * total_tiles
+
+        for step in range(max_steps):
+            if cost == 0:
+                break
+            i = rng.randrange(total_tiles)
+            moves = tile_moves(i, assignment, fixed)
+            if not moves:
+                continue
+            if rng.random() < walk_prob:
+                move = rng.choice(moves)
+                delta = move_delta(move, assignment, contrib, current, targets, cost)
+            else:
+                move = None
+                delta = float('inf')
+                ties = 0
+                for candidate in moves:
+                    d = move_delta(candidate, assignment, contrib, current, targets, cost)
+                    j = candidate[2]
+                    tabu = tabu_until[i] > step or (j >= 0 and tabu_until[j] > step)
+                    # Aspiration: a tabu move is still allowed if it beats the best cost so far.
+                    if tabu and cost + d >= best_cost:
+                        continue
+                    if d < delta:
+                        move, delta, ties = candidate, d, 1
+                    elif d == delta:
+                        # Break ties uniformly at random (reservoir sampling).
+                        ties += 1
+                        if rng.randrange(ties) == 0:
+                            move = candidate
+                if move is None:
+                    continue
+            apply_move(move, assignment, contrib, current)
+            cost += delta
+            tabu_until[i] = step + tabu_tenure
+            if move[2] >= 0:
+                tabu_until[move[2]] = step + tabu_tenure
+            if cost < best_cost:
+                best_cost = cost
+
+        if cost == 0:
+            return build_node(tile_array, assignment, targets, tile_count)
+    return None
+
+def random_assignment(tile_count, total_tiles, rng, fixed=None):
+    """
+    Returns a random list of layout options (0-3: EL, 4: OUTER, 5: FULL), one per tile,
+    with exactly tile_count[0] OUTER, tile_count[1] EL and tile_count[2] FULL tiles.
+    Tiles in fixed ({tile_index: layout option}) get their forced layout.
+    """
+    fixed = fixed or {}
+    order = [i for i in range(total_tiles) if i not in fixed]
+    rng.shuffle(order)
+    assignment = [5] * total_tiles
+    outer, el = tile_count[0], tile_count[1]
+    for i, option in fixed.items():
+        assignment[i] = option
+        if option == 4:
+            outer -= 1
+        elif option < 4:
+            el -= 1
+    for k, i in enumerate(order):
+        if k < outer:
+            assignment[i] = 4
+        elif k < outer + el:
+            assignment[i] = rng.randrange(4)
+    return assignment
+
+def tile_moves(i, assignment, fixed=None):
+    """
+    Lists the moves involving tile i as (i, new option for i, j, new option for j) tuples:
+      - swapping layouts with every tile j that has a different layout,
+      - turning tile i to another EL orientation (j is -1).
+    Both kinds of move keep the layout counts unchanged. Tiles in fixed are never moved.
+    """
+    fixed = fixed or {}
+    moves = []
+    if i in fixed:
+        return moves
+    for j in range(len(assignment)):
+        if assignment[j] != assignment[i] and j not in fixed:
+            moves.append((i, assignment[j], j, assignment[i]))
+    if assignment[i] < 4:
+        for el in range(4):
+            if el != assignment[i]:
+                moves.append((i, el, -1, -1))
+    return moves
+
+def move_delta(move, assignment, contrib, current, targets, cost):
+    """
+    Returns the change in L1 gap caused by a move, using only the contribution
+    vectors of the tiles it touches.
+    """
+    i, new_i, j, new_j = move
+    new_cost = 0
+    for c in range(4):
+        value = current[c] - contrib[i][assignment[i]][c] + contrib[i][new_i][c]
+        if j >= 0:
+            value += contrib[j][new_j][c] - contrib[j][assignment[j]][c]
+        new_cost += abs(value - targets[c])
+    return new_cost - cost
+
+def apply_move(move, assignment, contrib, current):
+    """Applies a move to the assignment and keeps the uncovered color counts up to date."""
+    i, new_i, j, new_j = move
+    for c in range(4):
+        current[c] += contrib[i][new_i][c] - contrib[i][assignment[i]][c]
+        if j >= 0:
+            current[c] += contrib[j][new_j][c] - contrib[j][assignment[j]][c]
+    assignment[i] = new_i
+    if j >= 0:
+        assignment[j] = new_j
+
+def gap(current, targets):
+    """Returns the L1 distance between the uncovered color counts and the targets."""
+    return sum(abs(current[c] - targets[c]) for c in range(4))
+
+def build_node(tile_array, assignment, targets, tile_count):
+    """Builds a Node whose tiles carry the layouts of the given assignment."""
+    for i, option in enumerate(assignment):
+        tile_array[i].layout = Layouts.getOption(option)
+        tile_array[i].layoutName = Layouts.OPTION_NAMES[option]
+    return Node(tile_array, targets, tile_count)
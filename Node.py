@@ -1,3 +1,4 @@
+import hashlib
 from Tile import Tile
 from Layouts import Layouts
 
@@ -13,6 +14,22 @@ class Node:
         self.layoutTarget = tile_count[:]   # Make a copy to avoid accidental modification
         self.colorTarget = target_num[:]      # Copy of color targets
         self.parent = None
+        # Optional TileClasses grouping of interchangeable tiles (see SearchAlgorithm.csp_alg),
+        # and the index of the first class whose layout counts are not decided yet.
+        self.classes = None
+        self.next_class = 0
+        # Search bookkeeping: entry of this node in the move log, and the
+        # (tile index, layout option) move that produced it from its parent.
+        self.move_id = -1
+        self.move = None
+        # Tile ordering: "static" (bush count, computed once and shared by all Nodes)
+        # or "dynamic" (fewest feasible layouts first, see feasible_options).
+        self.ordering = "static"
+        self.static_order = None
+        self.feasible = None
+        self.feasible_gap = None
+        # Indices of tiles whose layout was fixed before the search (see Presolve).
+        self.fixed = frozenset()
         self.currentLayoutCount = self.layout_number_calc()
         self.currentColorCount = self.target_number_calc()
         self.distLayout = tile_count[0] + tile_count[1] + tile_count[2]
@@ -28,15 +45,42 @@ class Node:
         for tile in base.tiles:
             # Create a new Tile copying value, layout, and layoutName.
             new_tile = Tile(tile.value.copy(), tile.layout.copy(), tile.layoutName)
+            new_tile.contrib = tile.contrib  # values are unchanged, so share the cache
             new_tiles.append(new_tile)
         new_node = cls(new_tiles, base.colorTarget, base.layoutTarget)
         new_node.parent = base
-        new_node.currentLayoutCount = new_node.layout_number_calc()
-        new_node.currentColorCount = new_node.target_number_calc()
+        new_node.classes = base.classes
+        new_node.next_class = base.next_class
+        new_node.ordering = base.ordering
+        new_node.fixed = base.fixed
+        new_node.static_order = base.static_order
+        # Shared with the parent; feasible_options builds new lists from them.
+        new_node.feasible = base.feasible
+        new_node.feasible_gap = base.feasible_gap
+        # Tiles are unchanged, so the counts computed by the constructor already hold.
         new_node.distColor = base.distColor
         new_node.distLayout = base.distLayout
         return new_node
 
+    @classmethod
+    def from_assignment(cls, tiles, target_num, tile_count, assignment):
+        """
+        Creates a Node from a per-tile assignment of layout options (0-3: EL, 4: OUTER, 5: FULL).
+          - tiles: list of Tile objects used as templates for their values and contribution caches.
+        """
+        new_tiles = []
+        for tile, option in zip(tiles, assignment):
+            new_tile = Tile(tile.value, Layouts.getOption(option), Layouts.OPTION_NAMES[option])
+            new_tile.contrib = tile.contributions()
+            new_tiles.append(new_tile)
+        new_node = cls(new_tiles, target_num, tile_count)
+        new_node.dist_calc()
+        return new_node
+
+    def assignment(self):
+        """Returns the layout option (0-3: EL, 4: OUTER, 5: FULL) of every tile."""
+        return [Layouts.OPTION_INDEX[tile.layoutName] for tile in self.tiles]
+
     def layout_number_calc(self):
         """
         Count how many tiles are assigned to each layout.
@@ -60,20 +104,23 @@ class Node:
         Count how many bush colors (represented by characters '1','2','3','4') are uncovered.
         A bush is counted only if tile.value[j] is one of '1','2','3','4'
         and the corresponding tile.layout[j] is '0'.
+        Tiles with a known layout name use their cached Tile.contributions().
         Returns a list of four counts [one, two, three, four].
         """
-        one = two = three = four = 0
+        counts = [0, 0, 0, 0]
         for tile in self.tiles:
+            option = Layouts.OPTION_INDEX.get(tile.layoutName)
+            if option is not None:
+                contrib = tile.contributions()[option]
+                counts[0] += contrib[0]
+                counts[1] += contrib[1]
+                counts[2] += contrib[2]
+                counts[3] += contrib[3]
+                continue
             for j in range(len(tile.value)):
-                if tile.value[j] == '1' and tile.layout[j] == '0':
-                    one += 1
-                if tile.value[j] == '2' and tile.layout[j] == '0':
-                    two += 1
-                if tile.value[j] == '3' and tile.layout[j] == '0':
-                    three += 1
-                if tile.value[j] == '4' and tile.layout[j] == '0':
-                    four += 1
-        return [one, two, three, four]
+                if tile.value[j] in {'1', '2', '3', '4'} and tile.layout[j] == '0':
+                    counts[int(tile.value[j]) - 1] += 1
+        return counts
 
     def final_check(self):
         """
@@ -166,24 +213,96 @@ class Node:
 
     def tile_order(self):
         """
-        Organizes tiles from the one with the fewest assigned bush values to the one with the most.
-        For each tile, it counts the number of characters in tile.value that are in {'1','2','3','4'}.
-        Returns a list of [tile_index, count] pairs sorted by count.
+        Returns the order in which get_neighbors branches on tiles, as [tile_index, count] pairs.
+          - "static": tiles from the fewest bushes to the most (count is the bush count).
+            Tile values never change, so the order is computed once and shared by all Nodes.
+          - "dynamic": FULL tiles with the fewest feasible layouts first (count is the number
+            of feasible layouts, see feasible_options), then the assigned tiles in static order.
         """
-        order = []
+        if self.static_order is None:
+            order = []
+            for i, tile in enumerate(self.tiles):
+                count = 0
+                for char in tile.value:
+                    if char in {'1', '2', '3', '4'}:
+                        count += 1
+                order.append([i, count])
+            order.sort(key=lambda pair: pair[1])
+            self.static_order = order
+        if self.ordering != "dynamic":
+            return self.static_order
+        feasible = self.feasible_options()
+        unassigned = []
+        assigned = []
+        for i, count in self.static_order:
+            if feasible[i] is None:
+                assigned.append([i, count])
+            else:
+                unassigned.append([i, len(feasible[i])])
+        # sort is stable, so ties keep the static order.
+        unassigned.sort(key=lambda pair: pair[1])
+        return unassigned + assigned
+
+    def feasible_options(self):
+        """
+        For every FULL tile, lists the layout options (0-3: EL, 4: OUTER) it could still take:
+        the layout count is below its target and no color would exceed its target.
+        Assigned tiles get None.
+        The lists are updated incrementally: while the remaining gaps only shrink,
+        options ruled out for the parent stay ruled out, so only the parent's
+        remaining options are rechecked.
+        """
+        gap = [self.colorTarget[c] - self.currentColorCount[c] for c in range(4)]
+        gap.append(self.layoutTarget[0] - self.currentLayoutCount[0])
+        gap.append(self.layoutTarget[1] - self.currentLayoutCount[1])
+        base = None
+        if self.feasible is not None and all(g <= old for g, old in zip(gap, self.feasible_gap)):
+            base = self.feasible
+        feasible = []
         for i, tile in enumerate(self.tiles):
-            count = 0
-            for char in tile.value:
-                if char in {'1', '2', '3', '4'}:
-                    count += 1
-            order.append([i, count])
-        order.sort(key=lambda pair: pair[1])
-        return order
+            if tile.layoutName != "FULL":
+                feasible.append(None)
+                continue
+            candidates = base[i] if base is not None and base[i] is not None else range(5)
+            contrib = tile.contributions()
+            options = []
+            for option in candidates:
+                # gap[4] is the OUTER slack, gap[5] the EL slack.
+                if gap[4 if option == 4 else 5] <= 0:
+                    continue
+                if all(contrib[option][c] <= gap[c] for c in range(4)):
+                    options.append(option)
+            feasible.append(options)
+        self.feasible = feasible
+        self.feasible_gap = gap
+        return feasible
+
+    def state_key(self):
+        """
+        Returns a hashable key that is equal for two Nodes exactly when __eq__ holds:
+        the per-class layout counts and the next class to decide when tiles are grouped,
+        otherwise the tile layout names.
+        """
+        names = [tile.layoutName for tile in self.tiles]
+        if self.classes is not None:
+            return (self.next_class, self.classes.signature(names))
+        return tuple(names)
+
+    def fingerprint(self):
+        """
+        Returns a fixed-size (64-bit) fingerprint of state_key(), stable across processes,
+        so that visited states can be remembered without keeping their Nodes.
+        """
+        digest = hashlib.blake2b(repr(self.state_key()).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
 
     def __eq__(self, other):
         """
         Checks equality between two Node objects.
         Two Nodes are equal if their layout and color counts are the same and all tile layouts match.
+        When tiles are grouped into classes, interchangeable tiles may swap layouts:
+        the nodes are equal if every class has the same number of tiles in each layout
+        and the same classes are decided.
         """
         if not isinstance(other, Node):
             return False
@@ -191,6 +310,10 @@ class Node:
             return False
         if self.currentColorCount != other.currentColorCount:
             return False
+        if self.classes is not None and self.classes is other.classes:
+            return (self.next_class == other.next_class and
+                    self.classes.signature([tile.layoutName for tile in self.tiles]) ==
+                    self.classes.signature([tile.layoutName for tile in other.tiles]))
         for tile1, tile2 in zip(self.tiles, other.tiles):
             if tile1.layout != tile2.layout:
                 return False
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+class NogoodCache:
+    def __init__(self, capacity=100000):
+        """
+        Bounded table of residual subproblems already known to fail.
+          - capacity: maximum number of entries; the least recently used one is evicted first.
+        """
+        self.capacity = capacity
+        self.table = OrderedDict()
+        self.hits = 0  # Number of successful contains() lookups.
+
+    @staticmethod
+    def key(node):
+        """
+        Hashes the residual subproblem of a Node: the set of tiles still FULL
+        together with the remaining color and layout gaps.
+        When tiles are grouped into classes, which are decided one at a time
+        (see SearchAlgorithm.class_neighbors), the first undecided class is used
+        instead: every tile of that class and the following ones is still FULL.
+        """
+        if node.classes is not None:
+            remaining = node.next_class
+        else:
+            remaining = frozenset(i for i, tile in enumerate(node.tiles) if tile.layoutName == "FULL")
+        color_gap = tuple(node.colorTarget[i] - node.currentColorCount[i] for i in range(4))
+        layout_gap = tuple(node.layoutTarget[i] - node.currentLayoutCount[i] for i in range(3))
+        return hash((remaining, color_gap, layout_gap))
+
+    def add(self, node):
+        """Records the residual subproblem of node as failed."""
+        self.add_key(NogoodCache.key(node))
+
+    def add_key(self, key):
+        """Records a residual subproblem, given by its NogoodCache.key, as failed."""
+        self.table[key] = True
+        self.table.move_to_end(key)
+        if len(self.table) > self.capacity:
+            self.table.popitem(last=False)
+
+    def contains(self, node):
+        """Returns True if the residual subproblem of node is known to fail."""
+        key = NogoodCache.key(node)
+        if key in self.table:
+            self.table.move_to_end(key)
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self):
+        """Return the number of recorded nogoods."""
+        return len(self.table)
@@ -0,0 +1,162 @@
+import heapq
+import multiprocessing
+import os
+import queue
+from ConstraintProp import ConstraintProp
+from Node import Node
+from Tile import Tile
+from Layouts import Layouts
+from TileClasses import TileClasses
+from SearchAlgorithm import get_neighbors, solution_print
+
+def parallel_alg(tiles, targets, tile_count, total_tiles, workers=None, use_classes=True,
+                 ordering="static", fixed=None):
+    """
+    Hash-distributed best-first search (HDA*-style) over several worker processes.
+    Prints the solution in the same format as csp_alg.
+    Returns 0 if a solution is found, -1 otherwise.
+    """
+    solution = parallel_search(tiles, targets, tile_count, total_tiles, workers, use_classes, ordering, fixed)
+    if solution is None:
+        return -1
+    solution_print(solution)
+    return 0
+
+def parallel_search(tiles, targets, tile_count, total_tiles, workers=None, use_classes=True,
+                    ordering="static", fixed=None):
+    """
+    Runs the search of csp_search split across worker processes:
+      - Every state is owned by the worker given by its fingerprint modulo the number of workers.
+      - Each worker keeps its own priority frontier (MRV order) and closed set of fingerprints,
+        and sends every generated neighbor to its owner's queue.
+      - A shared counter holds the number of states sent but not yet expanded or discarded;
+        when it drops to zero, the search space is exhausted and every worker stops.
+      - The first worker to reach a solution reports it and tells all the others to stop.
+      - fixed ({tile_index: layout option}, e.g. Presolve.fixed): forced layouts, as in csp_alg.
+    Returns the solution Node, or None if no solution exists.
+    """
+    workers = workers or os.cpu_count() or 1
+    inboxes = [multiprocessing.Queue() for _ in range(workers)]
+    results = multiprocessing.Queue()
+    pending = multiprocessing.Value('i', 0)
+    found = multiprocessing.Event()
+
+    templates = [Tile(tiles[i], Layouts.getInitialLayout(), "FULL") for i in range(total_tiles)]
+    fixed = fixed or {}
+    assignment = [fixed.get(i, 5) for i in range(total_tiles)]
+    start = Node.from_assignment(templates, targets, tile_count, assignment)
+    if use_classes:
+        start.classes = TileClasses.group(templates)
+    pending.value = 1
+    inboxes[start.fingerprint() % workers].put((start.distColor, start.distLayout, start.assignment(), 0))
+
+    processes = []
+    for rank in range(workers):
+        process = multiprocessing.Process(
+            target=hda_worker,
+            args=(rank, tiles, targets, tile_count, total_tiles, use_classes, ordering, fixed,
+                  inboxes, results, pending, found))
+        process.start()
+        processes.append(process)
+
+    assignment = None
+    while assignment is None and any(process.is_alive() for process in processes):
+        try:
+            assignment = results.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    if assignment is None:
+        # A worker may have reported a solution right before every worker exited.
+        try:
+            assignment = results.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    found.set()
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+    if assignment is None:
+        return None
+    solution = Node.from_assignment(templates, targets, tile_count, assignment)
+    if use_classes:
+        solution.classes = start.classes
+    return solution
+
+def hda_worker(rank, tiles, targets, tile_count, total_tiles, use_classes, ordering, fixed,
+               inboxes, results, pending, found):
+    """
+    Worker loop of parallel_search. States travel between workers as
+    (distColor, distLayout, assignment, next_class) tuples and are rebuilt into Nodes on expansion.
+    """
+    # Leftover states must not keep this process from exiting once the search stops.
+    # (The results queue is left alone so that a reported solution is always delivered.)
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+
+    templates = [Tile(tiles[i], Layouts.getInitialLayout(), "FULL") for i in range(total_tiles)]
+    classes = TileClasses.group(templates) if use_classes else None
+    fixed = frozenset(fixed)
+    static_order = None
+    inbox = inboxes[rank]
+    open_heap = []
+    closed_set = set()
+    sequence = 0
+
+    while not found.is_set():
+        # Move every received state into the local frontier.
+        while True:
+            try:
+                dist_color, dist_layout, assignment, next_class = inbox.get_nowait()
+            except queue.Empty:
+                break
+            # Same order as Heuristic.mrv_calc: lowest distColor, then highest distLayout, then FIFO.
+            heapq.heappush(open_heap, (dist_color, -dist_layout, sequence, assignment, next_class))
+            sequence += 1
+
+        if not open_heap:
+            if pending.value == 0:
+                break
+            try:
+                dist_color, dist_layout, assignment, next_class = inbox.get(timeout=0.05)
+                heapq.heappush(open_heap, (dist_color, -dist_layout, sequence, assignment, next_class))
+                sequence += 1
+            except queue.Empty:
+                pass
+            continue
+
+        _, _, _, assignment, next_class = heapq.heappop(open_heap)
+        current = Node.from_assignment(templates, targets, tile_count, assignment)
+        current.classes = classes
+        current.next_class = next_class
+        current.ordering = ordering
+        current.static_order = static_order
+        current.fixed = fixed
+        fingerprint = current.fingerprint()
+        if fingerprint in closed_set:
+            with pending.get_lock():
+                pending.value -= 1
+            continue
+        closed_set.add(fingerprint)
+
+        if current.final_check():
+            results.put(assignment)
+            found.set()
+            break
+
+        neighbors = get_neighbors(current)
+        static_order = current.static_order
+        children = []
+        if ConstraintProp.AC3(neighbors):
+            for test in neighbors:
+                test_fingerprint = test.fingerprint()
+                if test_fingerprint % len(inboxes) == rank and test_fingerprint in closed_set:
+                    continue
+                children.append((test_fingerprint % len(inboxes),
+                                 (test.distColor, test.distLayout, test.assignment(), test.next_class)))
+        # Count the children before they become visible, and retire the current state.
+        with pending.get_lock():
+            pending.value += len(children) - 1
+        for owner, message in children:
+            inboxes[owner].put(message)
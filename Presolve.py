@@ -0,0 +1,97 @@
+from Tile import Tile
+from Layouts import Layouts
+
+class Presolve:
+    def __init__(self, tiles, targets, tile_count, total_tiles, landscape_tiles=None):
+        """
+        Cheap checks run between FileReader and the search.
+          - tiles, targets, tile_count, total_tiles: as returned by FileReader.
+          - landscape_tiles: number of tiles in the landscape (FileReader.get_landscape_tiles);
+            FileReader keeps only the first total_tiles tiles, so tiles alone cannot show
+            a landscape with too many tiles. Defaults to len(tiles).
+        After run():
+          - feasible: False if the problem provably has no solution.
+          - reason: why the problem is infeasible (None otherwise).
+          - color_min / color_max: bounds on the reachable uncovered count of each color.
+          - fixed: {tile_index: layout option} for tiles whose layout is forced
+            (option 5 for FULL, 0-4 for EL/OUTER).
+        """
+        self.tiles = tiles
+        self.targets = targets
+        self.tile_count = tile_count
+        self.total_tiles = total_tiles
+        self.landscape_tiles = len(tiles) if landscape_tiles is None else landscape_tiles
+        self.feasible = True
+        self.reason = None
+        self.color_min = None
+        self.color_max = None
+        self.fixed = {}
+
+    def run(self):
+        """Runs every check and returns self.feasible."""
+        if len(self.targets) != 4:
+            return self.reject(f"expected 4 color targets, got {len(self.targets)}")
+        if min(self.tile_count) < 0:
+            return self.reject(f"negative tile count in {self.tile_count}")
+        if self.landscape_tiles != self.total_tiles:
+            return self.reject(f"the landscape has {self.landscape_tiles} tiles "
+                               f"but the tile counts add up to {self.total_tiles}")
+
+        contrib = [Tile(value, Layouts.getInitialLayout(), "FULL").contributions() for value in self.tiles]
+        # Non-FULL options allowed by the layout counts.
+        allowed = []
+        if self.tile_count[1] > 0:
+            allowed.extend([0, 1, 2, 3])
+        if self.tile_count[0] > 0:
+            allowed.append(4)
+        uncovered = self.tile_count[0] + self.tile_count[1]
+
+        # Exactly `uncovered` tiles are not FULL; FULL tiles uncover nothing.
+        self.color_min = [0, 0, 0, 0]
+        self.color_max = [0, 0, 0, 0]
+        for c in range(4):
+            visible = sum(value.count(str(c + 1)) for value in self.tiles)
+            if self.targets[c] > visible:
+                return self.reject(f"target for color {c + 1} ({self.targets[c]}) exceeds "
+                                   f"the {visible} visible bushes")
+            if allowed:
+                best = sorted(max(contrib[i][o][c] for o in allowed) for i in range(self.total_tiles))
+                worst = sorted(min(contrib[i][o][c] for o in allowed) for i in range(self.total_tiles))
+                self.color_max[c] = sum(best[len(best) - uncovered:]) if uncovered else 0
+                self.color_min[c] = sum(worst[:uncovered])
+            if self.targets[c] > self.color_max[c]:
+                return self.reject(f"target for color {c + 1} ({self.targets[c]}) exceeds "
+                                   f"the most any layout choice can uncover ({self.color_max[c]})")
+            if self.targets[c] < self.color_min[c]:
+                return self.reject(f"target for color {c + 1} ({self.targets[c]}) is below "
+                                   f"the least any layout choice uncovers ({self.color_min[c]})")
+
+        # A non-FULL option uncovering more of a color than its target can never be used.
+        options = []
+        for i in range(self.total_tiles):
+            options.append([o for o in allowed
+                            if all(contrib[i][o][c] <= self.targets[c] for c in range(4))])
+        candidates = [i for i in range(self.total_tiles) if options[i]]
+        if len(candidates) < uncovered:
+            return self.reject(f"only {len(candidates)} tiles can take an OUTER or EL layout, "
+                               f"but {uncovered} are required")
+        for i in range(self.total_tiles):
+            if not options[i]:
+                self.fixed[i] = 5
+            elif len(candidates) == uncovered and len(options[i]) == 1:
+                # Every candidate must be non-FULL, and this one has a single way to be.
+                self.fixed[i] = options[i][0]
+        forced = [0, 0, 0]
+        for option in self.fixed.values():
+            forced[Layouts.getCategory(option)] += 1
+        for k, name in enumerate(["OUTER_BOUNDARY", "EL_SHAPE", "FULL_BLOCK"]):
+            if forced[k] > self.tile_count[k]:
+                return self.reject(f"{forced[k]} tiles are forced to {name}, "
+                                   f"but only {self.tile_count[k]} are allowed")
+        return True
+
+    def reject(self, reason):
+        """Marks the problem as infeasible and returns False."""
+        self.feasible = False
+        self.reason = reason
+        return False
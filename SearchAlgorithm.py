@@ -3,17 +3,53 @@ from Node import Node
 from Heuristic import Heuristic
 from Tile import Tile
 from Layouts import Layouts
+from TileClasses import TileClasses
+from NogoodCache import NogoodCache
+from SolutionCounter import uncover_bounds, allowed_index, compositions
 
-def csp_alg(tiles, targets, tile_count, total_tiles):
+def csp_alg(tiles, targets, tile_count, total_tiles, use_classes=True, nogood_size=100000,
+            ordering="static", fixed=None):
     """
     CSP algorithm:
       - Create an ordered tile array (each tile initialized with a FULL layout).
       - Create the starting Node.
+      - If use_classes is set and some tiles are interchangeable (identical contributions
+        under every layout), group them and branch on the layout counts of one class at a time
+        (see class_neighbors), so that permutations among them are searched only once.
       - Maintain an open list and closed list.
+      - If nogood_size is nonzero and tiles are grouped, remember up to that many failed
+        residual subproblems (same undecided classes, same remaining gaps) and skip neighbors
+        that reach one again. Class moves only assign FULL tiles, so a residual fully decides
+        what is left to search; per-tile moves may re-lay out assigned tiles, so the per-tile
+        search keeps no nogoods.
+      - ordering selects how tiles are ordered for branching (see Node.tile_order):
+        "static" (bush count) or "dynamic" (fewest feasible layouts first).
+      - fixed ({tile_index: layout option}, e.g. Presolve.fixed) assigns forced layouts
+        up front; those tiles are never branched on.
       - Use MRV to choose the next node; if a solution is found (final_check passes),
         print the solution; otherwise, generate neighbors via LCV and AC3 consistency.
     Returns 0 if a solution is found, -1 otherwise.
     """
+    solution = csp_search(tiles, targets, tile_count, total_tiles, use_classes, nogood_size, ordering,
+                          fixed)
+    if solution is None:
+        return -1
+    solution_print(solution)
+    return 0
+
+def csp_search(tiles, targets, tile_count, total_tiles, use_classes=True, nogood_size=100000,
+               ordering="static", fixed=None, nogoods=None):
+    """
+    Runs the CSP search described in csp_alg.
+    nogoods can be an existing NogoodCache to fill (e.g. to inspect it afterwards);
+    by default a new one with nogood_size entries is used. Either way, it is only
+    used when tiles are grouped into classes.
+    Only open Nodes are kept alive: the closed set holds fixed-size fingerprints, and
+    the path to every Node is recorded in a compact move log of (parent id, tile, layout)
+    entries instead of parent references.
+    Returns the solution Node, with its moves from the start in solution.path,
+    or None if the search space is exhausted.
+    """
     cp = ConstraintProp()
 
     # Create tile array with each tile initialized with FULL layout.
@@ -22,32 +58,205 @@ def csp_alg(tiles, targets, tile_count, total_tiles):
         tile_array.append(Tile(tiles[i], Layouts.getInitialLayout(), "FULL"))
 
     start = Node(tile_array, targets, tile_count)
+    if use_classes:
+        start.classes = TileClasses.group(tile_array)
+    start.ordering = ordering
+    if fixed:
+        apply_fixed(start, fixed)
+    move_log = [(-1, -1, -1)]  # entry 0 is the start node
+    start.move_id = 0
     open_list = [start]
-    closed_list = []
+    open_set = {start.fingerprint()}
+    closed_set = set()
+    if start.classes is None:
+        nogoods = None
+    elif nogoods is None and nogood_size:
+        nogoods = NogoodCache(nogood_size)
+    # Expanded nodes still waiting on open children: move id -> [open children, nogood key].
+    pending = {}
 
     while open_list:
         # Use MRV heuristic to select index of best node.
         index = Heuristic.mrv_calc(open_list)
         current = open_list.pop(index)
-        closed_list.append(current)
+        fingerprint = current.fingerprint()
+        open_set.discard(fingerprint)
+        closed_set.add(fingerprint)
 
-        # If the current node is a solution, print and return.
+        # If the current node is a solution, return it.
         if current.final_check():
-            solution_print(current)
-            return 0
+            current.path = reconstruct_path(move_log, current.move_id)
+            return current
 
         # Generate neighbors using LCV heuristic.
         neighbors = get_neighbors(current)
 
         # Enforce arc consistency before adding neighbors.
+        children = 0
+        blocked = False
         if cp.AC3(neighbors):
             for test in neighbors:
-                if not in_closed(test, closed_list) and not in_open(test, open_list):
+                # Parent links were only needed for the arcs; drop them so expanded nodes can be freed.
+                test.parent = None
+                test_fingerprint = test.fingerprint()
+                # LCV may give a tile back its current layout: such a no-op move is not a child.
+                if test_fingerprint == fingerprint:
+                    continue
+                # Skip neighbors whose residual subproblem already failed.
+                if nogoods is not None and nogoods.contains(test):
+                    continue
+                if test_fingerprint not in closed_set and test_fingerprint not in open_set:
+                    move_log.append((current.move_id, test.move[0], test.move[1]))
+                    test.move_id = len(move_log) - 1
                     open_list.append(test)
+                    open_set.add(test_fingerprint)
+                    children += 1
                 else:
-                    test.parent = current
+                    # The duplicate may still succeed elsewhere, so this subtree is not a proven failure.
+                    blocked = True
 
-    return -1
+        if nogoods is not None and not blocked:
+            if children == 0:
+                # Nothing left to explore below the current node: record it as a nogood.
+                record_failure(current.move_id, NogoodCache.key(current), move_log, pending, nogoods)
+            else:
+                pending[current.move_id] = [children, NogoodCache.key(current)]
+
+    return None
+
+def apply_fixed(node, fixed):
+    """
+    Assigns the forced layouts {tile_index: layout option} to node and marks
+    those tiles as fixed so that get_neighbors leaves them alone.
+    """
+    for tile_index, option in fixed.items():
+        set_layout(node, tile_index, option)
+    node.fixed = frozenset(fixed)
+
+def set_layout(node, tile_index, option):
+    """
+    Gives the tile at tile_index the layout option (0-3: EL, 4: OUTER, 5: FULL).
+    Returns the result of Node.change_layout.
+    """
+    if option < 4:
+        return node.change_layout(tile_index, 1, option)  # EL
+    elif option == 4:
+        return node.change_layout(tile_index, 0, 0)  # Outer
+    return node.change_layout(tile_index, 2, 0)  # Full
+
+def reconstruct_path(move_log, move_id):
+    """
+    Follows the move log back from move_id to the start node.
+    Returns the list of (tile index, layout option) moves leading from the start to that node.
+    A class move (see class_neighbors) is logged as tuples of tiles and layouts; it adds one
+    move per tile.
+    """
+    path = []
+    while move_id > 0:
+        parent_id, tile, layout = move_log[move_id]
+        if isinstance(tile, tuple):
+            path.extend(reversed(list(zip(tile, layout))))
+        else:
+            path.append((tile, layout))
+        move_id = parent_id
+    path.reverse()
+    return path
+
+def beam_search(tiles, targets, tile_count, total_tiles, beam_width=100, max_width=None, widen=4,
+                use_classes=True, max_depth=None, fixed=None):
+    """
+    Memory-bounded beam search:
+      - Expand every Node of the current layer with get_neighbors and AC3 consistency.
+      - Keep only the beam_width best neighbors (Heuristic.gap_rank) as the next layer.
+      - Stop when the beam runs dry or max_depth layers pass (default 2 * total_tiles).
+      - If max_width is set, retry with the width multiplied by widen as long as it
+        stays within max_width; by default only one pass is made.
+      - fixed ({tile_index: layout option}, e.g. Presolve.fixed): forced layouts, as in csp_alg.
+    At most one layer of candidates (beam_width Nodes times their neighbors) is alive at once,
+    plus one hash per Node that entered the beam, so memory is set by the largest width used.
+    Prints the solution and returns 0 if one is found, -1 otherwise.
+    """
+    solution = beam_solve(tiles, targets, tile_count, total_tiles, beam_width, max_width, widen,
+                          use_classes, max_depth, fixed)
+    if solution is None:
+        return -1
+    solution_print(solution)
+    return 0
+
+def beam_solve(tiles, targets, tile_count, total_tiles, beam_width=100, max_width=None, widen=4,
+               use_classes=True, max_depth=None, fixed=None):
+    """
+    Runs the beam search described in beam_search, widening the beam up to max_width.
+    Returns the solution Node, or None if every attempt failed.
+    """
+    width = beam_width
+    max_width = beam_width if max_width is None else max_width
+    while True:
+        solution = beam_layers(tiles, targets, tile_count, total_tiles, width, use_classes, max_depth, fixed)
+        if solution is not None or width * widen > max_width or widen <= 1:
+            return solution
+        width *= widen
+
+def beam_layers(tiles, targets, tile_count, total_tiles, beam_width, use_classes=True, max_depth=None,
+                fixed=None):
+    """
+    Runs a single beam search with a fixed width.
+    Returns the solution Node, or None if the beam ran dry or hit max_depth.
+    """
+    tile_array = []
+    for i in range(total_tiles):
+        tile_array.append(Tile(tiles[i], Layouts.getInitialLayout(), "FULL"))
+    start = Node(tile_array, targets, tile_count)
+    if use_classes:
+        start.classes = TileClasses.group(tile_array)
+    if fixed:
+        apply_fixed(start, fixed)
+    if max_depth is None:
+        max_depth = 2 * total_tiles
+
+    layer = [start]
+    # Hashes of the Nodes that entered the beam (at most beam_width per layer),
+    # so that the beam never steps back into them.
+    visited = {hash(start.state_key())}
+    for _ in range(max_depth):
+        candidates = {}
+        for current in layer:
+            if current.final_check():
+                return current
+            neighbors = get_neighbors(current)
+            if ConstraintProp.AC3(neighbors):
+                for test in neighbors:
+                    key = hash(test.state_key())
+                    if key not in visited:
+                        candidates.setdefault(key, test)
+        layer = Heuristic.gap_rank(candidates.values(), beam_width)
+        for node in layer:
+            visited.add(hash(node.state_key()))
+            # Drop parent links so earlier layers can be garbage collected.
+            node.parent = None
+        if not layer:
+            break
+    for current in layer:
+        if current.final_check():
+            return current
+    return None
+
+def record_failure(move_id, key, move_log, pending, nogoods):
+    """
+    Records the node with the given move id and nogood key as a failed subproblem,
+    then walks up the move log: a parent whose open children have all failed is
+    exhausted as well. Parents not in pending (e.g. with a duplicate child) are never recorded.
+    """
+    nogoods.add_key(key)
+    parent_id = move_log[move_id][0]
+    while parent_id in pending:
+        entry = pending[parent_id]
+        entry[0] -= 1
+        if entry[0] > 0:
+            break
+        nogoods.add_key(entry[1])
+        del pending[parent_id]
+        parent_id = move_log[parent_id][0]
 
 def get_neighbors(current):
     """
@@ -56,10 +265,16 @@ def get_neighbors(current):
     For each tile, a new neighbor is created (copy of current),
     the best layout option is determined via LCV, and the layout is changed.
     If the neighbor isn’t already in the list—and it passes arc consistency—it’s added.
+    Tiles fixed before the search (Node.fixed) are skipped.
+    When the Node carries tile classes, class_neighbors is used instead.
     """
+    if current.classes is not None:
+        return class_neighbors(current)
     neighbors = []
     tile_order_list = current.tile_order()  # Returns list of [tile_index, count] pairs.
     for i in range(len(current.tiles)):
+        if tile_order_list[i][0] in current.fixed:
+            continue
         # Create a deep copy using the Node copy constructor.
         neighbor = Node.from_node(current)
         # Use LCV heuristic on the tile indicated by tile_order_list[i][0]
@@ -77,6 +292,8 @@ def get_neighbors(current):
             neighbor.change_layout(tile_order_list[i][0], 0, 0)  # Outer
         elif layout == 5:
             neighbor.change_layout(tile_order_list[i][0], 2, 0)  # Full
+        # Remember the move that produced this neighbor (tile index, layout option).
+        neighbor.move = (tile_order_list[i][0], layout)
 
         # Add neighbor if it is not already in the list.
         if neighbor not in neighbors:
@@ -86,6 +303,61 @@ def get_neighbors(current):
                 neighbors.remove(neighbor)
     return neighbors
 
+def class_neighbors(current):
+    """
+    Generate the neighbors of a Node whose tiles are grouped into classes (see TileClasses).
+    Interchangeable tiles only matter by how many of them take each layout, so classes are
+    decided one at a time, in index order: each neighbor splits the free (not fixed) members
+    of the next class over the distinct layouts (same contributions and layout type, FULL
+    included), handed out to members in index order. Every class count is tried, so no
+    assignment is missed. A split is dropped when it breaks a target, or when the undecided
+    classes can no longer make up the remaining gaps (see SolutionCounter.uncover_bounds).
+    The move of a neighbor is the tuple of its class members and the tuple of their layouts.
+    """
+    classes = current.classes
+    k = current.next_class
+    while k < len(classes) and all(i in current.fixed for i in classes.members[k]):
+        k += 1
+    if k == len(classes):
+        return []
+    free = [i for i in classes.members[k] if i not in current.fixed]
+    contrib = current.tiles[free[0]].contributions()
+    options = {}
+    for option in range(6):
+        options.setdefault((tuple(contrib[option]), Layouts.getCategory(option)), option)
+    options = list(options.values())
+    bounds = uncover_bounds([current.tiles[i].contributions()
+                             for members in classes.members[k + 1:] for i in members if i not in current.fixed])
+    gap = [current.colorTarget[c] - current.currentColorCount[c] for c in range(4)]
+    outer = current.layoutTarget[0] - current.currentLayoutCount[0]
+    el = current.layoutTarget[1] - current.currentLayoutCount[1]
+
+    neighbors = []
+    for counts in compositions(len(free), len(options)):
+        rest = gap.copy()
+        used = [0, 0, 0]
+        for option, n in zip(options, counts):
+            used[Layouts.getCategory(option)] += n
+            for c in range(4):
+                rest[c] -= n * contrib[option][c]
+        rest_outer = outer - used[0]
+        rest_el = el - used[1]
+        if min(rest) < 0 or rest_outer < 0 or rest_el < 0 or rest_outer + rest_el >= len(bounds):
+            continue
+        least, most = bounds[rest_outer + rest_el][allowed_index(rest_outer, rest_el)]
+        if not all(least[c] <= rest[c] <= most[c] for c in range(4)):
+            continue
+        layouts = tuple(option for option, n in zip(options, counts) for _ in range(n))
+        neighbor = Node.from_node(current)
+        neighbor.next_class = k + 1
+        for tile_index, option in zip(free, layouts):
+            if option != 5:
+                set_layout(neighbor, tile_index, option)
+        neighbor.move = (tuple(free), layouts)
+        neighbor.parent = current
+        neighbors.append(neighbor)
+    return neighbors
+
 def solution_print(current):
     """
     Prints the solution:
@@ -99,8 +371,14 @@ def solution_print(current):
     out_str += "Color Count: " + str(current.currentColorCount)
     print(out_str)
 
-def in_open(node, open_list):
-    return node in open_list
-
-def in_closed(node, closed_list):
-    return node in closed_list
+def solution_dict(current):
+    """
+    Returns the solution as a dictionary (e.g. for JSON output):
+      - assignment: layout name of each tile, by tile index.
+      - layout_count / color_count: current layout and color counts.
+    """
+    return {
+        "assignment": [tile.layoutName for tile in current.tiles],
+        "layout_count": list(current.currentLayoutCount),
+        "color_count": list(current.currentColorCount),
+    }
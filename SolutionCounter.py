@@ -0,0 +1,284 @@
+from math import comb, factorial
+from Tile import Tile
+from Layouts import Layouts
+from TileClasses import TileClasses
+
+def count_alg(tiles, targets, tile_count, total_tiles, distinct="tiles"):
+    """
+    Prints the exact number of solutions.
+    Returns 0 if there is at least one solution, -1 otherwise.
+    """
+    number = count_solutions(tiles, targets, tile_count, total_tiles, distinct)
+    print(number)
+    return 0 if number else -1
+
+def enumerate_alg(tiles, targets, tile_count, total_tiles, limit=None, distinct="tiles"):
+    """
+    Prints up to limit solutions (all of them if limit is None), one "<index>: <layout name>"
+    block per solution, separated by blank lines.
+    Returns 0 if at least one solution was printed, -1 otherwise.
+    """
+    printed = 0
+    for assignment in iter_solutions(tiles, targets, tile_count, total_tiles, distinct):
+        if limit is not None and printed >= limit:
+            break
+        if printed:
+            print()
+        for i, name in enumerate(assignment):
+            print(f"{i}: {name}")
+        printed += 1
+    return 0 if printed else -1
+
+def count_solutions(tiles, targets, tile_count, total_tiles, distinct="tiles"):
+    """
+    Returns the exact number of assignments meeting targets and tile_count, without building them.
+      - distinct="tiles": every per-tile assignment counts once.
+      - distinct="classes": assignments that only permute layouts among interchangeable
+        tiles (see TileClasses) count once.
+    """
+    return SolutionCounter(tiles, targets, tile_count, total_tiles, distinct).count()
+
+def iter_solutions(tiles, targets, tile_count, total_tiles, distinct="tiles"):
+    """
+    Lazily yields every assignment meeting targets and tile_count, as lists of layout names.
+    Each assignment is yielded exactly once; with distinct="classes", only one assignment per
+    permutation of interchangeable tiles is yielded.
+    """
+    return SolutionCounter(tiles, targets, tile_count, total_tiles, distinct).solutions()
+
+class SolutionCounter:
+    def __init__(self, tiles, targets, tile_count, total_tiles, distinct="tiles"):
+        """
+        Counts and enumerates solutions class by class (see TileClasses).
+        Within a class, options with the same contribution and layout type are merged into
+        groups, so a class is described by how many of its tiles fall in each group.
+        Partial assignments are only told apart by their residual state: the color counts and
+        the OUTER/EL/FULL counts still to be reached by the remaining classes.
+        """
+        if distinct not in ("tiles", "classes"):
+            raise ValueError(f"Unknown distinct mode: {distinct}")
+        self.distinct = distinct
+        self.targets = tuple(targets)
+        self.tile_count = tuple(tile_count)
+        self.total_tiles = total_tiles
+        templates = [Tile(tiles[i], Layouts.getInitialLayout(), "FULL") for i in range(total_tiles)]
+        self.classes = TileClasses(templates)
+        # groups[k]: list of (contribution, layout count index, options) for class k.
+        self.groups = []
+        for signature in self.classes.signatures:
+            merged = {}
+            for option in range(6):
+                merged.setdefault((signature[option], Layouts.getCategory(option)), []).append(option)
+            self.groups.append([(key[0], key[1], options) for key, options in merged.items()])
+        # distributions[k]: list of (tiles per group, weight, color total, layout totals) for class k.
+        self.distributions = []
+        for k, members in enumerate(self.classes.members):
+            entries = []
+            for counts in compositions(len(members), len(self.groups[k])):
+                colors = [0, 0, 0, 0]
+                layouts = [0, 0, 0]
+                for (contrib, category, _), n in zip(self.groups[k], counts):
+                    for c in range(4):
+                        colors[c] += n * contrib[c]
+                    layouts[category] += n
+                entries.append((counts, self.weight(k, counts), tuple(colors), tuple(layouts)))
+            self.distributions.append(entries)
+        self.valid = (len(self.targets) == 4 and min(self.targets) >= 0 and min(self.tile_count) >= 0
+                      and sum(self.tile_count) == total_tiles)
+
+    def weight(self, k, counts):
+        """
+        Number of solutions one group distribution of class k stands for:
+          - "tiles": ways to pick which tiles go in each group (multinomial), times the
+            choice of option inside each group for every tile.
+          - "classes": number of per-option count vectors inside each group.
+        """
+        result = 1
+        if self.distinct == "tiles":
+            result = factorial(sum(counts))
+            for (_, _, options), n in zip(self.groups[k], counts):
+                result = result // factorial(n) * len(options) ** n
+        else:
+            for (_, _, options), n in zip(self.groups[k], counts):
+                result *= comb(n + len(options) - 1, len(options) - 1)
+        return result
+
+    def signatures(self, start, stop):
+        """Signatures of every tile (not class) in classes start..stop-1."""
+        return [self.classes.signatures[k] for k in range(start, stop) for _ in self.classes.members[k]]
+
+    def count(self):
+        """
+        Returns the number of solutions, by dynamic programming from the last class to the first.
+        Layer k maps what classes k.. uncover to the number of ways they do it; a state is dropped
+        when classes ..k-1 cannot make up the rest (see uncover_bounds). States are packed into
+        single ints (see Packing) and only one layer is kept at a time.
+        """
+        if not self.valid:
+            return 0
+        packing = Packing(max(max(self.targets), self.total_tiles))
+        target = packing.pack(self.targets + self.tile_count[:2])
+        guard = packing.guard
+        colors_mask = packing.pack([packing.mask] * 4)
+        layouts_mask = packing.pack([0] * 4 + [packing.mask] * 2)
+        layer = {0: 1}
+        for k in range(len(self.groups) - 1, -1, -1):
+            # limits[packed OUTER/EL still needed]: (most colors | guard, least colors) classes ..k-1 uncover.
+            bounds = uncover_bounds(self.signatures(0, k))
+            limits = {}
+            for outer in range(self.tile_count[0] + 1):
+                for el in range(self.tile_count[1] + 1):
+                    if outer + el >= len(bounds):
+                        continue
+                    least, most = bounds[outer + el][allowed_index(outer, el)]
+                    limits[packing.pack([0] * 4 + [outer, el])] = (
+                        packing.pack([min(m, packing.mask) for m in most]) | guard,
+                        packing.pack([min(m, packing.mask) for m in least]))
+            steps = [(weight, packing.pack(delta + used[:2])) for _, weight, delta, used in self.distributions[k]]
+            following = {}
+            for state, ways in layer.items():
+                for weight, delta in steps:
+                    new = state + delta
+                    rest = (target | guard) - new
+                    if rest & guard != guard:
+                        continue  # Uncovers more than a target.
+                    rest ^= guard
+                    limit = limits.get(rest & layouts_mask)
+                    if limit is None:
+                        continue
+                    colors = rest & colors_mask
+                    if (limit[0] - colors) & guard != guard or ((colors | guard) - limit[1]) & guard != guard:
+                        continue
+                    following[new] = following.get(new, 0) + weight * ways
+            layer = following
+        return layer.get(target, 0)
+
+    def solutions(self):
+        """
+        Generator over every solution, as lists of layout names.
+        A depth-first walk over the classes that skips residual states outside uncover_bounds,
+        and records the residual states found to have no completion so they are never walked twice.
+        """
+        if not self.valid:
+            return
+        self.suffix_bounds = [uncover_bounds(self.signatures(k, len(self.groups)))
+                              for k in range(len(self.groups) + 1)]
+        assignment = [5] * self.total_tiles
+        yield from self.walk(0, self.targets, self.tile_count, assignment, set())
+
+    def reachable(self, k, colors, layouts):
+        """False if classes k.. certainly cannot uncover colors with the layout counts layouts."""
+        bounds = self.suffix_bounds[k]
+        if layouts[0] + layouts[1] >= len(bounds):
+            return False
+        least, most = bounds[layouts[0] + layouts[1]][allowed_index(layouts[0], layouts[1])]
+        return all(least[c] <= colors[c] <= most[c] for c in range(4))
+
+    def walk(self, k, colors, layouts, assignment, dead):
+        """Yields the completions of classes k.. and returns whether there was any."""
+        if k == len(self.groups):
+            yield [Layouts.OPTION_NAMES[option] for option in assignment]
+            return True
+        found = False
+        for counts, _, delta, used in self.distributions[k]:
+            new_colors = tuple(colors[c] - delta[c] for c in range(4))
+            new_layouts = tuple(layouts[i] - used[i] for i in range(3))
+            if min(new_colors) < 0 or min(new_layouts) < 0:
+                continue
+            if (k + 1, new_colors, new_layouts) in dead or not self.reachable(k + 1, new_colors, new_layouts):
+                continue
+            if self.distinct == "tiles":
+                fills = self.fill_tiles(k, list(counts), 0, assignment)
+            else:
+                fills = self.fill_classes(k, counts, 0, 0, assignment)
+            for _ in fills:
+                if not (yield from self.walk(k + 1, new_colors, new_layouts, assignment, dead)):
+                    break  # Every fill leads to the same dead state.
+                found = True
+        if not found:
+            dead.add((k, colors, layouts))
+        return found
+
+    def fill_tiles(self, k, counts, index, assignment):
+        """
+        Assigns the members of class k from index on, in every way that puts counts[j]
+        of them in group j; yields once per complete fill.
+        """
+        members = self.classes.members[k]
+        if index == len(members):
+            yield
+            return
+        for j, n in enumerate(counts):
+            if n == 0:
+                continue
+            counts[j] -= 1
+            for option in self.groups[k][j][2]:
+                assignment[members[index]] = option
+                yield from self.fill_tiles(k, counts, index + 1, assignment)
+            counts[j] += 1
+
+    def fill_classes(self, k, counts, j, position, assignment):
+        """
+        Assigns the members of class k one per-option count vector at a time:
+        options are handed out to members in index order.
+        """
+        members = self.classes.members[k]
+        if j == len(counts):
+            yield
+            return
+        options = self.groups[k][j][2]
+        for split in compositions(counts[j], len(options)):
+            index = position
+            for option, n in zip(options, split):
+                for _ in range(n):
+                    assignment[members[index]] = option
+                    index += 1
+            yield from self.fill_classes(k, counts, j + 1, index, assignment)
+
+class Packing:
+    def __init__(self, largest):
+        """
+        Packs vectors of non-negative ints up to largest into one int, one field per entry.
+        The top bit of each field is a guard: (a | guard) - b keeps every guard bit set
+        exactly when no field of b exceeds the same field of a.
+        """
+        self.width = (largest + 1).bit_length() + 1
+        self.mask = (1 << (self.width - 1)) - 1
+        self.guard = self.pack([1 << (self.width - 1)] * 6)
+
+    def pack(self, values):
+        result = 0
+        for i, value in enumerate(values):
+            result |= value << (self.width * i)
+        return result
+
+def uncover_bounds(signatures):
+    """
+    For tiles with the given signatures: bounds[u][allowed] = (least, most), the per-color range
+    uncovered when exactly u tiles are not FULL and use layouts of the allowed types
+    (see allowed_index). FULL tiles uncover nothing.
+    """
+    bounds = [[] for _ in range(len(signatures) + 1)]
+    for options in ([4], [0, 1, 2, 3], [0, 1, 2, 3, 4]):
+        least = [sorted(min(s[o][c] for o in options) for s in signatures) for c in range(4)]
+        most = [sorted((max(s[o][c] for o in options) for s in signatures), reverse=True) for c in range(4)]
+        for u in range(len(signatures) + 1):
+            bounds[u].append((tuple(sum(least[c][:u]) for c in range(4)),
+                              tuple(sum(most[c][:u]) for c in range(4))))
+    return bounds
+
+def allowed_index(outer, el):
+    """Index into uncover_bounds for the layout types still needed: 0 OUTER only, 1 EL only, 2 both."""
+    if outer and el:
+        return 2
+    return 1 if el else 0
+
+def compositions(total, parts):
+    """Returns every tuple of parts non-negative ints adding up to total."""
+    if parts == 1:
+        return [(total,)]
+    result = []
+    for first in range(total + 1):
+        for rest in compositions(total - first, parts - 1):
+            result.append((first,) + rest)
+    return result
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import os
+import signal
+import stat
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from FileReader import FileReader
+from Layouts import Layouts
+from SearchAlgorithm import csp_search, beam_solve, solution_dict
+from LocalSearch import min_conflicts
+from Presolve import Presolve
+from WarmStart import repair_search
+
+def warm_worker():
+    """
+    Worker process initializer: the solver modules are imported once per worker,
+    and the precomputed layout tables are touched so that they are ready for every request.
+    """
+    return len(Layouts.UNCOVERED)
+
+class SolveTimeout(Exception):
+    """Raised inside a worker when a request runs past its time limit."""
+
+def raise_timeout(signum, frame):
+    raise SolveTimeout()
+
+def solve_request(request, time_limit=None):
+    """
+    Solves one request inside a worker process, giving up after time_limit seconds
+    (the request's own "time_limit" field takes precedence; None or 0 means no limit).
+    Returns a result dict whose "status" is "solved", "unsolved", "infeasible", "timeout" or "error".
+    """
+    limit = request.get("time_limit", time_limit) if isinstance(request, dict) else time_limit
+    if limit:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, limit)
+    try:
+        return run_request(request)
+    except SolveTimeout:
+        return {"status": "timeout", "error": f"no result within {limit}s"}
+    finally:
+        if limit:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+def run_request(request):
+    """
+    Solves one request.
+    request: dict with either
+      - "file": path to an input file, or
+      - "text": the problem in the input file format,
+    and optionally "mode" ("csp", "local", "beam" or "repair"), "ordering" (csp), "beam_width", "max_beam_width",
+    "seed", "prior" (repair: the previous assignment, see WarmStart.parse_assignment)
+    and "max_changes" (repair).
+    Returns a result dict whose "status" is "solved", "unsolved", "infeasible" or "error".
+    A solved result also carries the fields of SearchAlgorithm.solution_dict,
+    an infeasible one the presolve "reason".
+    """
+    fr = FileReader()
+    try:
+        if "file" in request:
+            fr.read_file(request["file"])
+        elif "text" in request:
+            fr.read_text(request["text"])
+        else:
+            return {"status": "error", "error": "request needs a 'file' or 'text' field"}
+        args = (fr.get_tiles(), fr.get_targets(), fr.get_tile_count(), fr.get_total_tiles())
+        presolve = Presolve(*args, fr.get_landscape_tiles())
+        if not presolve.run():
+            return {"status": "infeasible", "reason": presolve.reason}
+        mode = request.get("mode", "csp")
+        if mode == "csp":
+            solution = csp_search(*args, ordering=request.get("ordering", "static"), fixed=presolve.fixed)
+        elif mode == "local":
+            solution = min_conflicts(*args, seed=request.get("seed"), fixed=presolve.fixed)
+        elif mode == "beam":
+            solution = beam_solve(*args, beam_width=request.get("beam_width", 100),
+                                  max_width=request.get("max_beam_width"), fixed=presolve.fixed)
+        elif mode == "repair":
+            solution = repair_search(*args, request["prior"], request.get("max_changes", 4))
+        else:
+            return {"status": "error", "error": f"Unknown mode: {mode}"}
+    except SolveTimeout:
+        raise
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+    if solution is None:
+        return {"status": "unsolved"}
+    result = {"status": "solved"}
+    result.update(solution_dict(solution))
+    if mode == "repair":
+        result["changed"] = solution.changed
+    return result
+
+class SolverDaemon:
+    def __init__(self, workers=None, time_limit=60):
+        """
+        Long-lived solver service.
+          - workers: number of worker processes (default: number of CPUs).
+          - time_limit: seconds a request may hold a worker before it is answered with
+            a "timeout" status (None or 0: no limit); a request's "time_limit" field overrides it.
+        Requests and results are JSON objects, one per line. A request's "id" field,
+        if any, is copied to its result so that concurrent answers can be matched.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker)
+        # Start every worker now instead of on the first requests.
+        warming = [self.executor.submit(warm_worker) for _ in range(self.workers)]
+        for future in warming:
+            future.result()
+
+    def restart(self, executor):
+        """
+        Replaces a broken executor (e.g. after a worker was killed) with a new one.
+        Requests failing on the same broken executor only replace it once.
+        """
+        if self.executor is executor:
+            executor.shutdown(wait=False)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker)
+
+    async def handle_line(self, line):
+        """Solves the request on one JSON line and returns the result as a JSON line."""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return json.dumps({"status": "error", "error": f"Invalid request: {e}"}) + "\n"
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            result = await loop.run_in_executor(executor, solve_request, request, self.time_limit)
+        except BrokenProcessPool as e:
+            self.restart(executor)
+            result = {"status": "error", "error": f"solver worker died: {e}"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        if "id" in request:
+            result["id"] = request["id"]
+        return json.dumps(result) + "\n"
+
+    async def serve_lines(self, reader, write):
+        """
+        Reads request lines until EOF and answers each one as soon as it is solved,
+        so a slow problem does not hold back the ones submitted after it.
+        """
+        async def respond(line):
+            write(await self.handle_line(line))
+
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.create_task(respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def handle_client(self, reader, writer):
+        """Serves one Unix socket connection."""
+        try:
+            await self.serve_lines(reader, lambda text: writer.write(text.encode()))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_unix(self, path):
+        """
+        Serves requests on a Unix socket at path until cancelled.
+        A socket left at path by an earlier run is replaced; anything else there is
+        left alone and FileExistsError is raised.
+        """
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"{path} exists and is not a socket")
+            os.remove(path)
+        server = await asyncio.start_unix_server(self.handle_client, path, limit=2 ** 24)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_stdin(self):
+        """Serves requests read from stdin, writing results to stdout."""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=2 ** 24)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def write(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+        await self.serve_lines(reader, write)
+
+    def close(self):
+        """Stops the worker processes."""
+        self.executor.shutdown()
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python SolverDaemon.py <socket_path|-> [workers [time_limit]]", file=sys.stderr)
+        sys.exit(1)
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    time_limit = float(sys.argv[3]) if len(sys.argv) > 3 else 60
+    daemon = SolverDaemon(workers, time_limit)
+    try:
+        if sys.argv[1] == "-":
+            asyncio.run(daemon.serve_stdin())
+        else:
+            asyncio.run(daemon.serve_unix(sys.argv[1]))
+    except KeyboardInterrupt:
+        pass
+    except FileExistsError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        daemon.close()
+
+if __name__ == '__main__':
+    main()
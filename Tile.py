@@ -1,3 +1,5 @@
+from Layouts import Layouts
+
 class Tile:
     def __init__(self, val, lay, name):
         """
@@ -11,4 +13,22 @@ class Tile:
         self.value = val
         self.layout = lay
         self.domain = ['O', 'E', 'F']
-        self.layoutName = name
\ No newline at end of file
+        self.layoutName = name
+        # Uncovered color counts per layout option, filled in by contributions().
+        self.contrib = None
+
+    def contributions(self):
+        """
+        Returns the uncovered bush counts [one, two, three, four] of this tile
+        under each of the six layout options (EL 0-3, OUTER, FULL).
+        Tile values never change, so the result is computed once and cached.
+        """
+        if self.contrib is None:
+            self.contrib = []
+            for option in range(6):
+                counts = [0, 0, 0, 0]
+                for j in Layouts.UNCOVERED[option]:
+                    if self.value[j] in {'1', '2', '3', '4'}:
+                        counts[int(self.value[j]) - 1] += 1
+                self.contrib.append(counts)
+        return self.contrib
@@ -0,0 +1,52 @@
+from Layouts import Layouts
+
+class TileClasses:
+    def __init__(self, tiles):
+        """
+        Groups interchangeable tiles into equivalence classes.
+          - tiles: list of Tile objects.
+        Two tiles are interchangeable when they uncover the same bush colors under
+        all six layout options, i.e. their Tile.contributions() are identical.
+          - class_of: class index of every tile.
+          - members: tile indices of every class, in increasing order.
+          - signatures: the shared contribution vectors of every class.
+        """
+        self.class_of = []
+        self.members = []
+        self.signatures = []
+        index = {}
+        for i, tile in enumerate(tiles):
+            signature = tuple(tuple(counts) for counts in tile.contributions())
+            if signature not in index:
+                index[signature] = len(self.members)
+                self.members.append([])
+                self.signatures.append(signature)
+            self.class_of.append(index[signature])
+            self.members[index[signature]].append(i)
+
+    @staticmethod
+    def group(tiles):
+        """
+        Returns the TileClasses of tiles, or None when no two tiles are interchangeable:
+        then grouping prunes nothing and only slows down state hashing.
+        """
+        classes = TileClasses(tiles)
+        return classes if len(classes) < len(tiles) else None
+
+    def __len__(self):
+        """Return the number of classes."""
+        return len(self.members)
+
+    def counts(self, layout_names):
+        """
+        Compresses a per-tile assignment (list of layout names) into, for every class,
+        the number of its tiles assigned to each option (EL 0-3, OUTER, FULL).
+        """
+        class_counts = [[0] * 6 for _ in self.members]
+        for i, name in enumerate(layout_names):
+            class_counts[self.class_of[i]][Layouts.OPTION_INDEX[name]] += 1
+        return class_counts
+
+    def signature(self, layout_names):
+        """Returns the class-level counts of an assignment as a hashable tuple."""
+        return tuple(tuple(counts) for counts in self.counts(layout_names))
@@ -0,0 +1,125 @@
+from Node import Node
+from Tile import Tile
+from Layouts import Layouts
+from SearchAlgorithm import csp_search, solution_print
+
+def repair_alg(tiles, targets, tile_count, total_tiles, prior, max_changes=4, fallback=True, fixed=None):
+    """
+    Warm-start re-solve: repairs a previous assignment (see parse_assignment) so that
+    it meets the new targets and tile_count while changing as few tiles as possible.
+    If no repair within max_changes tiles exists and fallback is set, solves from scratch with csp_search,
+    using the forced layouts in fixed ({tile_index: layout option}, e.g. Presolve.fixed).
+    Prints the solution in the same format as csp_alg.
+    Returns 0 if a solution is found, -1 otherwise.
+    """
+    solution = repair_search(tiles, targets, tile_count, total_tiles, prior, max_changes)
+    if solution is None and fallback:
+        solution = csp_search(tiles, targets, tile_count, total_tiles, fixed=fixed)
+    if solution is None:
+        return -1
+    solution_print(solution)
+    return 0
+
+def parse_assignment(prior, total_tiles):
+    """
+    Converts a previous assignment into a list of layout options (0-3: EL, 4: OUTER, 5: FULL).
+    prior can be:
+      - the text printed by solution_print ("<index>: <layout name>" lines, other lines ignored),
+      - a result dict with an "assignment" list (SearchAlgorithm.solution_dict),
+      - a solved Node,
+      - a list of layout names or of layout options.
+    Raises ValueError if the assignment does not cover exactly total_tiles tiles.
+    """
+    if isinstance(prior, Node):
+        assignment = prior.assignment()
+    elif isinstance(prior, dict):
+        assignment = parse_assignment(prior["assignment"], total_tiles)
+    elif isinstance(prior, str):
+        by_index = {}
+        for line in prior.split('\n'):
+            index, sep, name = line.partition(':')
+            if sep and index.strip().isdigit() and name.strip() in Layouts.OPTION_INDEX:
+                by_index[int(index)] = Layouts.OPTION_INDEX[name.strip()]
+        if sorted(by_index) != list(range(len(by_index))):
+            raise ValueError("prior assignment has missing tile indices")
+        assignment = [by_index[i] for i in range(len(by_index))]
+    else:
+        assignment = [Layouts.OPTION_INDEX[o] if isinstance(o, str) else int(o) for o in prior]
+    if len(assignment) != total_tiles:
+        raise ValueError(f"prior assignment has {len(assignment)} tiles, expected {total_tiles}")
+    return assignment
+
+def repair_search(tiles, targets, tile_count, total_tiles, prior, max_changes=4):
+    """
+    Bounded repair search: iterative deepening over the number of changed tiles
+    (0, 1, ..., max_changes), so the first solution found changes the fewest tiles.
+    Each level is a depth-first search that changes tiles in increasing index order and prunes
+    with two bounds: a change moves the layout counts by at most 2 (one tile leaves a layout
+    and joins another), and changes to tiles i.. can shift each color by at most the largest
+    per-tile shift among those tiles.
+    Returns the solution Node, with the changed tile indices in solution.changed, or None.
+    """
+    assignment = parse_assignment(prior, total_tiles)
+    templates = [Tile(tiles[i], Layouts.getInitialLayout(), "FULL") for i in range(total_tiles)]
+    contrib = [tile.contributions() for tile in templates]
+
+    colors = [0, 0, 0, 0]
+    layouts = [0, 0, 0]
+    for i, option in enumerate(assignment):
+        for c in range(4):
+            colors[c] += contrib[i][option][c]
+        layouts[Layouts.getCategory(option)] += 1
+
+    # suffix_shift[i][c]: largest change of color c a single tile among i.. can cause.
+    suffix_shift = [[0, 0, 0, 0] for _ in range(total_tiles + 1)]
+    for i in range(total_tiles - 1, -1, -1):
+        for c in range(4):
+            shift = max(abs(contrib[i][o][c] - contrib[i][assignment[i]][c]) for o in range(6))
+            suffix_shift[i][c] = max(shift, suffix_shift[i + 1][c])
+
+    changed = []
+
+    def bounded(start, remaining):
+        layout_gap = sum(abs(layouts[k] - tile_count[k]) for k in range(3))
+        if layout_gap > 2 * remaining:
+            return False
+        for c in range(4):
+            if abs(colors[c] - targets[c]) > remaining * suffix_shift[start][c]:
+                return False
+        return True
+
+    def apply(i, option, sign):
+        for c in range(4):
+            colors[c] += sign * (contrib[i][option][c] - contrib[i][assignment[i]][c])
+        layouts[Layouts.getCategory(assignment[i])] -= sign
+        layouts[Layouts.getCategory(option)] += sign
+
+    def search(start, remaining):
+        if colors == targets and layouts == tile_count:
+            return True
+        if remaining == 0 or not bounded(start, remaining):
+            return False
+        for i in range(start, total_tiles):
+            if not bounded(i, remaining):
+                # suffix_shift only shrinks with i, so later tiles cannot do better.
+                break
+            for option in range(6):
+                if option == assignment[i]:
+                    continue
+                apply(i, option, 1)
+                changed.append((i, option))
+                if search(i + 1, remaining - 1):
+                    return True
+                changed.pop()
+                apply(i, option, -1)
+        return False
+
+    for limit in range(max_changes + 1):
+        if search(0, limit):
+            repaired = assignment[:]
+            for i, option in changed:
+                repaired[i] = option
+            solution = Node.from_assignment(templates, targets, tile_count, repaired)
+            solution.changed = [i for i, _ in changed]
+            return solution
+    return None
@@ -1,12 +1,28 @@
 from FileReader import FileReader
 from ConstraintProp import ConstraintProp
-from SearchAlgorithm import csp_alg
+from SearchAlgorithm import csp_alg, beam_search
+from LocalSearch import local_search
+from ParallelSearch import parallel_alg
+from Presolve import Presolve
+from WarmStart import repair_alg, parse_assignment
+from SolutionCounter import count_alg, enumerate_alg
 import sys
 
 def main():
     # Check if the input file argument is provided
     if len(sys.argv) < 2:
-        print("Usage: python main.py <input_file>", file=sys.stderr)
+        print("Usage: python main.py <input_file> [csp [static|dynamic]|local|beam [width [max_width]]|parallel [workers]|repair <prior_solution_file>|count|enumerate [limit]]",
+              file=sys.stderr)
+        sys.exit(1)
+    # Optional search mode, defaults to the systematic CSP search
+    mode = sys.argv[2] if len(sys.argv) > 2 else "csp"
+    if mode not in ("csp", "local", "beam", "parallel", "repair", "count", "enumerate"):
+        print(f"Unknown mode: {mode}", file=sys.stderr)
+        sys.exit(1)
+    # Optional tile ordering of the CSP search
+    ordering = sys.argv[3] if mode == "csp" and len(sys.argv) > 3 else "static"
+    if ordering not in ("static", "dynamic"):
+        print(f"Unknown ordering: {ordering}", file=sys.stderr)
         sys.exit(1)
 
     # Initialize FileReader and read the input file
@@ -27,8 +43,48 @@ def main():
     tile_count = fr.get_tile_count()    # List of target counts for layouts.
     total_tiles = fr.get_total_tiles()  # Total number of tiles.
 
-    # Run the CSP algorithm
-    a = csp_alg(tiles, targets, tile_count, total_tiles)
+    # Reject impossible problems before searching, and find forced layouts
+    presolve = Presolve(tiles, targets, tile_count, total_tiles, fr.get_landscape_tiles())
+    if not presolve.run():
+        print(f"Infeasible: {presolve.reason}", file=sys.stderr)
+        if mode == "count":
+            print(0)  # The number of solutions, as count_alg prints it.
+        print(-1)
+        return
+
+    # Run the selected search algorithm
+    if mode == "local":
+        a = local_search(tiles, targets, tile_count, total_tiles, fixed=presolve.fixed)
+    elif mode == "beam":
+        beam_width = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+        max_width = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        a = beam_search(tiles, targets, tile_count, total_tiles, beam_width=beam_width, max_width=max_width,
+                        fixed=presolve.fixed)
+    elif mode == "parallel":
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        a = parallel_alg(tiles, targets, tile_count, total_tiles, workers=workers, fixed=presolve.fixed)
+    elif mode == "repair":
+        if len(sys.argv) < 4:
+            print("repair mode needs the file with the previous solution", file=sys.stderr)
+            sys.exit(1)
+        prior_file = sys.argv[3]
+        try:
+            with open(prior_file, 'r', encoding='utf-8') as f:
+                prior = parse_assignment(f.read(), total_tiles)
+        except FileNotFoundError:
+            print(f"File not found: {prior_file}", file=sys.stderr)
+            sys.exit(1)
+        except (OSError, ValueError) as e:
+            print(f"Invalid prior solution in {prior_file}: {e}", file=sys.stderr)
+            sys.exit(1)
+        a = repair_alg(tiles, targets, tile_count, total_tiles, prior, fixed=presolve.fixed)
+    elif mode == "count":
+        a = count_alg(tiles, targets, tile_count, total_tiles)
+    elif mode == "enumerate":
+        limit = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        a = enumerate_alg(tiles, targets, tile_count, total_tiles, limit=limit)
+    else:
+        a = csp_alg(tiles, targets, tile_count, total_tiles, ordering=ordering, fixed=presolve.fixed)
     print(a)
 
 if __name__ == '__main__':
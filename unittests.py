@@ -5,6 +5,22 @@ from Node import Node
 from Arc import Arc
 from ConstraintProp import ConstraintProp
 from Heuristic import Heuristic
+from TileClasses import TileClasses
+from NogoodCache import NogoodCache
+from SearchAlgorithm import record_failure, beam_layers, beam_solve, csp_search, reconstruct_path
+from SolverDaemon import SolverDaemon, solve_request
+from FileReader import FileReader
+from ParallelSearch import parallel_search
+from Presolve import Presolve
+from WarmStart import parse_assignment, repair_search
+from SolutionCounter import count_solutions, iter_solutions
+from LocalSearch import min_conflicts, random_assignment
+import os
+import tempfile
+import random
+import itertools
+import asyncio
+import json
 
 ##############################################
 # Test for the Layouts class
@@ -139,6 +155,31 @@ class TestNode(unittest.TestCase):
         for _, count in order:
             self.assertEqual(count, 16)
 
+    def test_static_order_cached(self):
+        order = self.node.tile_order()
+        child = Node.from_node(self.node)
+        self.assertIs(child.tile_order(), order)
+
+    def test_dynamic_order(self):
+        # Tile 0 has bushes only in its centre, tile 1 everywhere, tile 2 none.
+        centre = [' '] * 16
+        for j in (5, 6, 9, 10):
+            centre[j] = '1'
+        values = [centre, ['1'] * 16, [' '] * 16]
+        tiles = [Tile(v, Layouts.getInitialLayout(), "FULL") for v in values]
+        node = Node(tiles, [4, 0, 0, 0], [1, 1, 1])
+        node.ordering = "dynamic"
+        feasible = node.feasible_options()
+        # Tile 1 uncovers 9 bushes under an EL, so only OUTER (4 bushes) fits it.
+        self.assertEqual(feasible, [[0, 1, 2, 3, 4], [4], [0, 1, 2, 3, 4]])
+        # Most constrained first; ties keep the static (bush count) order.
+        self.assertEqual([i for i, _ in node.tile_order()], [1, 2, 0])
+        # After assigning tile 2 OUTER, no OUTER slack is left anywhere.
+        child = Node.from_node(node)
+        child.change_layout(2, option=0, el=0)
+        self.assertEqual(child.feasible_options(), [[0, 1, 2, 3], [], None])
+        self.assertEqual([i for i, _ in child.tile_order()], [1, 0, 2])
+
 ##############################################
 # Test for ConstraintProp class
 ##############################################
@@ -184,6 +225,14 @@ class TestHeuristic(unittest.TestCase):
         chosen = Heuristic.tie(0, 1, open_list)
         self.assertEqual(chosen, 1)
     
+    def test_gap_score(self):
+        # One OUTER slot left; the bush tile can uncover 4 bushes of color 1, the empty tile none.
+        tiles = [Tile(value, Layouts.getInitialLayout(), "FULL") for value in (['1'] * 16, [' '] * 16)]
+        self.assertEqual(Heuristic.gap_score(Node(tiles, [4, 0, 0, 0], [1, 0, 1])), 4)
+        self.assertEqual(Heuristic.gap_score(Node(tiles, [2, 0, 0, 0], [1, 0, 1])), 0)
+        # 5 bushes cannot be uncovered: 100 per bush outside the range, plus the distance from its middle.
+        self.assertEqual(Heuristic.gap_score(Node(tiles, [5, 0, 0, 0], [1, 0, 1])), 106)
+
     def test_lcv_calc(self):
         # Create a Node with one tile whose domain includes 'E'.
         value = ['1', '2', '3', '4'] * 4
@@ -195,6 +244,515 @@ class TestHeuristic(unittest.TestCase):
         # Option should be one of the valid values: 0,1,2,3,4, or 5.
         self.assertIn(option, [0, 1, 2, 3, 4, 5])
 
+##############################################
+# Helper: a small random problem with a known solution
+##############################################
+def make_problem(n_tiles, tile_count, seed=0, kinds=None):
+    """
+    Returns (tiles, targets, tile_count, total_tiles) for a random landscape
+    whose targets are produced by a random assignment meeting tile_count.
+    If kinds is set, tiles are drawn from that many random values plus an empty tile,
+    so that most of them have duplicates.
+    """
+    rng = random.Random(seed)
+    if kinds is None:
+        tiles = [[rng.choice(' 1234') for _ in range(16)] for _ in range(n_tiles)]
+    else:
+        values = [[rng.choice(' 1234') for _ in range(16)] for _ in range(kinds)] + [[' '] * 16]
+        tiles = [list(rng.choice(values)) for _ in range(n_tiles)]
+    assignment = random_assignment(tile_count, n_tiles, rng)
+    targets = [0, 0, 0, 0]
+    for i, option in enumerate(assignment):
+        contrib = Tile(tiles[i], Layouts.getInitialLayout(), "FULL").contributions()
+        for c in range(4):
+            targets[c] += contrib[option][c]
+    return tiles, targets, tile_count, n_tiles
+
+##############################################
+# Test for tile contributions
+##############################################
+class TestContributions(unittest.TestCase):
+    def test_contributions(self):
+        value = ['1', '2', '3', '4'] * 4
+        tile = Tile(value, Layouts.getInitialLayout(), "FULL")
+        contrib = tile.contributions()
+        self.assertEqual(len(contrib), 6)
+        # OUTER leaves the four centre cells (indices 5, 6, 9, 10) uncovered.
+        self.assertEqual(contrib[4], [0, 2, 2, 0])
+        # FULL covers everything.
+        self.assertEqual(contrib[5], [0, 0, 0, 0])
+        # EL layouts leave 9 cells uncovered.
+        for option in range(4):
+            self.assertEqual(sum(contrib[option]), 9)
+
+    def test_get_category(self):
+        self.assertEqual([Layouts.getCategory(o) for o in range(6)], [1, 1, 1, 1, 0, 2])
+
+##############################################
+# Test for the min-conflicts local search
+##############################################
+class TestLocalSearch(unittest.TestCase):
+    def test_random_assignment_counts(self):
+        assignment = random_assignment([3, 4, 5], 12, random.Random(1))
+        self.assertEqual(sum(1 for o in assignment if o == 4), 3)
+        self.assertEqual(sum(1 for o in assignment if o < 4), 4)
+        self.assertEqual(sum(1 for o in assignment if o == 5), 5)
+
+    def test_min_conflicts_solves(self):
+        tiles, targets, tile_count, total = make_problem(30, [8, 12, 10], seed=3)
+        node = min_conflicts(tiles, targets, tile_count, total, seed=5)
+        self.assertIsNotNone(node)
+        self.assertTrue(node.final_check())
+
+    def test_min_conflicts_bad_counts(self):
+        tiles, targets, _, total = make_problem(4, [1, 1, 2])
+        self.assertIsNone(min_conflicts(tiles, targets, [1, 1, 1], total))
+
+##############################################
+# Test for the TileClasses grouping
+##############################################
+class TestTileClasses(unittest.TestCase):
+    def setUp(self):
+        empty = [' '] * 16
+        bush = ['1'] + [' '] * 15
+        self.tiles = [Tile(v.copy(), Layouts.getInitialLayout(), "FULL")
+                      for v in [empty, bush, empty, bush, empty]]
+        self.classes = TileClasses(self.tiles)
+
+    def test_grouping(self):
+        self.assertEqual(len(self.classes), 2)
+        self.assertEqual(self.classes.members, [[0, 2, 4], [1, 3]])
+        self.assertEqual(self.classes.class_of, [0, 1, 0, 1, 0])
+
+    def test_counts(self):
+        names = ["FULL", "OUTER", "EL 2", "FULL", "FULL"]
+        counts = self.classes.counts(names)
+        self.assertEqual(counts, [[0, 0, 1, 0, 0, 2], [0, 0, 0, 0, 1, 1]])
+        self.assertEqual(self.classes.signature(["FULL", "FULL", "EL 2", "OUTER", "FULL"]),
+                         tuple(map(tuple, counts)))
+
+    def test_group(self):
+        self.assertEqual(TileClasses.group(self.tiles).members, [[0, 2, 4], [1, 3]])
+        self.assertIsNone(TileClasses.group(self.tiles[:2]))
+
+    def test_csp_with_and_without_classes(self):
+        # Three interchangeable tiles: branching on one of them must not hide the others' layouts.
+        tiles = [list("43  4  4 4 24 12")] * 3 + [list("34    3   2    2")]
+        for use_classes in (True, False):
+            solution = csp_search(tiles, [1, 1, 1, 5], [2, 2, 0], 4, use_classes=use_classes)
+            self.assertIsNotNone(solution)
+            self.assertTrue(solution.final_check())
+        for seed in range(40):
+            n_tiles = 4 + seed % 5
+            problem = make_problem(n_tiles, [n_tiles // 2, n_tiles - n_tiles // 2 - 1, 1], seed, kinds=2)
+            with_classes = csp_search(*problem)
+            without = csp_search(*problem, use_classes=False)
+            # Class counts are searched exhaustively, so they find a solution whenever one exists.
+            self.assertEqual(with_classes is not None, count_solutions(*problem) > 0)
+            if without is not None:
+                self.assertIsNotNone(with_classes)
+            if with_classes is not None:
+                self.assertTrue(with_classes.final_check())
+
+    def test_class_path(self):
+        tiles, targets, tile_count, total = make_problem(6, [2, 2, 2], seed=3, kinds=2)
+        solution = csp_search(tiles, targets, tile_count, total)
+        self.assertIsNotNone(solution.classes)
+        # Class moves are logged as one entry per class but replayed one tile at a time.
+        assignment = [5] * total
+        for tile_index, option in solution.path:
+            assignment[tile_index] = option
+        self.assertEqual(assignment, solution.assignment())
+
+    def test_node_equality_ignores_permutations(self):
+        node1 = Node(self.tiles, [4, 4, 4, 4], [1, 1, 3])
+        node1.classes = self.classes
+        node2 = Node.from_node(node1)
+        node1.change_layout(0, option=0, el=0)
+        node2.change_layout(2, option=0, el=0)
+        self.assertEqual(node1, node2)
+        node2.classes = None
+        self.assertNotEqual(node1, node2)
+
+##############################################
+# Test for the NogoodCache
+##############################################
+class TestNogoodCache(unittest.TestCase):
+    def make_node(self):
+        value = ['1', '2', '3', '4'] * 4
+        tiles = [Tile(value.copy(), Layouts.getInitialLayout(), "FULL") for _ in range(3)]
+        return Node(tiles, [20, 20, 20, 20], [1, 1, 1])
+
+    def test_same_residual_same_key(self):
+        node1 = self.make_node()
+        node2 = self.make_node()
+        node1.change_layout(0, option=0, el=0)
+        node2.change_layout(0, option=0, el=0)
+        self.assertEqual(NogoodCache.key(node1), NogoodCache.key(node2))
+        node2.change_layout(1, option=1, el=0)
+        self.assertNotEqual(NogoodCache.key(node1), NogoodCache.key(node2))
+
+    def test_lru_eviction(self):
+        cache = NogoodCache(capacity=2)
+        nodes = [self.make_node() for _ in range(3)]
+        nodes[1].change_layout(0, option=0, el=0)
+        nodes[2].change_layout(1, option=0, el=0)
+        cache.add(nodes[0])
+        cache.add(nodes[1])
+        self.assertTrue(cache.contains(nodes[0]))  # nodes[0] becomes most recent
+        cache.add(nodes[2])
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.contains(nodes[0]))
+        self.assertFalse(cache.contains(nodes[1]))
+
+    def test_record_failure_propagates(self):
+        cache = NogoodCache()
+        # Move log: 0 is the start, 1 and 2 are children of 0, 3 is a child of 1.
+        move_log = [(-1, -1, -1), (0, 0, 4), (0, 1, 4), (1, 2, 0)]
+        pending = {0: [2, 100], 1: [1, 101]}
+        record_failure(3, 103, move_log, pending, cache)
+        # Node 1 had a single open child, so it fails too; the start still has node 2 open.
+        self.assertEqual(set(cache.table), {103, 101})
+        self.assertEqual(pending, {0: [1, 100]})
+        record_failure(2, 102, move_log, pending, cache)
+        self.assertIn(100, cache.table)
+        self.assertEqual(pending, {})
+        # Parents without a pending entry (e.g. with a duplicate child) are not recorded.
+        cache = NogoodCache()
+        record_failure(3, 203, move_log, {0: [1, 100]}, cache)
+        self.assertEqual(set(cache.table), {203})
+
+    def test_csp_search_records_and_hits(self):
+        tiles, targets, tile_count, total = make_problem(16, [6, 6, 4], seed=0, kinds=4)
+        # Three more bushes of every color than the known assignment: no solution exists.
+        targets = [t + 3 for t in targets]
+        self.assertEqual(count_solutions(tiles, targets, tile_count, total), 0)
+        cache = NogoodCache()
+        self.assertIsNone(csp_search(tiles, targets, tile_count, total, nogoods=cache))
+        self.assertGreater(len(cache), 0)
+        self.assertGreater(cache.hits, 0)
+
+    def test_csp_search_same_results_with_and_without_cache(self):
+        for seed in range(12):
+            kinds = None if seed % 2 else 2
+            problem = make_problem(6, [2, 3, 1], seed, kinds=kinds)
+            targets = problem[1]
+            if seed % 3 == 0:
+                targets = [t + 1 for t in targets]
+            problem = (problem[0], targets, problem[2], problem[3])
+            cache = NogoodCache()
+            with_cache = csp_search(*problem, nogoods=cache)
+            without = csp_search(*problem, nogood_size=0)
+            self.assertEqual(with_cache is not None, without is not None)
+            if kinds is None:
+                # Per-tile moves may re-lay out assigned tiles, so no residual is ever recorded.
+                self.assertEqual(len(cache), 0)
+
+##############################################
+# Test for the move log and fingerprints
+##############################################
+class TestMoveLog(unittest.TestCase):
+    def test_reconstruct_path(self):
+        move_log = [(-1, -1, -1), (0, 3, 4), (1, 0, 2), (0, 1, 5)]
+        self.assertEqual(reconstruct_path(move_log, 2), [(3, 4), (0, 2)])
+        self.assertEqual(reconstruct_path(move_log, 0), [])
+
+    def test_fingerprint(self):
+        value = ['1', '2', '3', '4'] * 4
+        tiles = [Tile(value.copy(), Layouts.getInitialLayout(), "FULL") for _ in range(2)]
+        node = Node(tiles, [4, 4, 4, 4], [1, 0, 1])
+        copy = Node.from_node(node)
+        self.assertEqual(node.fingerprint(), copy.fingerprint())
+        copy.change_layout(1, option=0, el=0)
+        self.assertNotEqual(node.fingerprint(), copy.fingerprint())
+
+    def test_csp_search_path(self):
+        tiles = [[' '] * 16, ['1'] * 16]
+        solution = csp_search(tiles, [4, 0, 0, 0], [1, 0, 1], 2)
+        self.assertIsNotNone(solution)
+        self.assertEqual(solution.path, [(1, 4)])
+        self.assertIsNone(solution.parent)
+
+##############################################
+# Test for the parallel search
+##############################################
+class TestParallelSearch(unittest.TestCase):
+    def test_solves(self):
+        tiles = [[' '] * 16, ['1'] * 16, ['2'] * 16]
+        node = parallel_search(tiles, [4, 4, 0, 0], [2, 0, 1], 3, workers=2)
+        self.assertIsNotNone(node)
+        self.assertTrue(node.final_check())
+        self.assertEqual(node.assignment(), [5, 4, 4])
+
+    def test_exhausts(self):
+        # No layout uncovers 5 bushes of color 1: every worker must stop once the space is exhausted.
+        tiles = [[' '] * 16, ['1'] * 16]
+        self.assertIsNone(parallel_search(tiles, [5, 0, 0, 0], [1, 0, 1], 2, workers=2))
+
+    def test_from_assignment(self):
+        tiles = [Tile(['1'] * 16, Layouts.getInitialLayout(), "FULL"),
+                 Tile([' '] * 16, Layouts.getInitialLayout(), "FULL")]
+        node = Node.from_assignment(tiles, [4, 0, 0, 0], [1, 0, 1], [4, 5])
+        self.assertTrue(node.final_check())
+        self.assertEqual(node.distColor, 0)
+        self.assertEqual(node.assignment(), [4, 5])
+
+##############################################
+# Test for the Presolve checks
+##############################################
+class TestPresolve(unittest.TestCase):
+    def run_presolve(self, tiles, targets, tile_count):
+        presolve = Presolve(tiles, targets, tile_count, sum(tile_count))
+        presolve.run()
+        return presolve
+
+    def test_feasible(self):
+        presolve = self.run_presolve([['1'] * 16, [' '] * 16], [4, 0, 0, 0], [1, 0, 1])
+        self.assertTrue(presolve.feasible)
+        self.assertEqual(presolve.color_max, [4, 0, 0, 0])
+        # The empty tile could take OUTER too, so nothing is forced.
+        self.assertEqual(presolve.fixed, {})
+
+    def test_tile_total_mismatch(self):
+        presolve = Presolve([['1'] * 16], [4, 0, 0, 0], [1, 0, 1], 2)
+        self.assertFalse(presolve.run())
+        self.assertIn("tile counts", presolve.reason)
+
+    def test_landscape_larger_than_counts(self):
+        # Two tiles in the landscape, but the counts only cover one: FileReader drops the second.
+        fr = FileReader()
+        fr.read_text(INLINE_PROBLEM.replace("FULL_BLOCK=1", "FULL_BLOCK=0"))
+        self.assertEqual((fr.get_total_tiles(), fr.get_landscape_tiles()), (1, 2))
+        presolve = Presolve(fr.get_tiles(), fr.get_targets(), fr.get_tile_count(), fr.get_total_tiles(),
+                            fr.get_landscape_tiles())
+        self.assertFalse(presolve.run())
+        self.assertIn("landscape has 2 tiles", presolve.reason)
+
+    def test_target_above_visible(self):
+        presolve = self.run_presolve([['1'] * 16, [' '] * 16], [17, 0, 0, 0], [1, 0, 1])
+        self.assertFalse(presolve.feasible)
+        self.assertIn("visible", presolve.reason)
+
+    def test_target_above_max(self):
+        # OUTER uncovers only the 4 centre bushes.
+        presolve = self.run_presolve([['1'] * 16, [' '] * 16], [5, 0, 0, 0], [1, 0, 1])
+        self.assertFalse(presolve.feasible)
+        self.assertIn("most", presolve.reason)
+
+    def test_target_below_min(self):
+        # Both tiles must be OUTER, which uncovers at least 8 bushes of color 1.
+        presolve = self.run_presolve([['1'] * 16, ['1'] * 16], [7, 0, 0, 0], [2, 0, 0])
+        self.assertFalse(presolve.feasible)
+        self.assertIn("least", presolve.reason)
+
+    def test_forced(self):
+        # With all targets at 0, tiles 0 and 2 cannot uncover their bushes: both stay FULL.
+        # That leaves exactly two tiles for the two EL/OUTER slots.
+        tiles = [['1'] * 16, [' '] * 16, ['2'] * 16, [' '] * 16]
+        presolve = self.run_presolve(tiles, [0, 0, 0, 0], [0, 2, 2])
+        self.assertTrue(presolve.feasible)
+        self.assertEqual(presolve.fixed, {0: 5, 2: 5})
+        solution = csp_search(tiles, [0, 0, 0, 0], [0, 2, 2], 4, fixed=presolve.fixed)
+        self.assertIsNotNone(solution)
+        self.assertEqual([solution.tiles[i].layoutName for i in (0, 2)], ["FULL", "FULL"])
+        for solution in (beam_layers(tiles, [0, 0, 0, 0], [0, 2, 2], 4, beam_width=3, fixed=presolve.fixed),
+                         min_conflicts(tiles, [0, 0, 0, 0], [0, 2, 2], 4, seed=1, fixed=presolve.fixed)):
+            self.assertIsNotNone(solution)
+            self.assertEqual([solution.tiles[i].layoutName for i in (0, 2)], ["FULL", "FULL"])
+
+    def test_random_assignment_keeps_fixed(self):
+        assignment = random_assignment([1, 2, 2], 5, random.Random(3), {0: 4, 3: 1})
+        self.assertEqual((assignment[0], assignment[3]), (4, 1))
+        self.assertEqual(sum(1 for o in assignment if o == 4), 1)
+        self.assertEqual(sum(1 for o in assignment if o < 4), 2)
+
+    def test_forced_single_option(self):
+        centre = [' '] * 16
+        for j in (5, 6, 9, 10):
+            centre[j] = '1'
+        # Only OUTER is allowed and there is no FULL slot, so every tile is forced to OUTER.
+        presolve = self.run_presolve([centre, [' '] * 16], [4, 0, 0, 0], [2, 0, 0])
+        self.assertEqual(presolve.fixed, {0: 4, 1: 4})
+
+##############################################
+# Test for the warm-start repair search
+##############################################
+class TestWarmStart(unittest.TestCase):
+    def test_parse_assignment(self):
+        text = "0: OUTER\n1: EL 2\n2: FULL\nLayout Count: [1, 1, 1]\nColor Count: [0, 0, 0, 0]"
+        self.assertEqual(parse_assignment(text, 3), [4, 2, 5])
+        self.assertEqual(parse_assignment({"assignment": ["OUTER", "EL 2", "FULL"]}, 3), [4, 2, 5])
+        self.assertEqual(parse_assignment([4, 2, 5], 3), [4, 2, 5])
+        with self.assertRaises(ValueError):
+            parse_assignment(["OUTER"], 3)
+
+    def test_repair_changes_few_tiles(self):
+        tiles, targets, tile_count, total = make_problem(20, [5, 8, 7], seed=4)
+        prior = min_conflicts(tiles, targets, tile_count, total, seed=1)
+        assignment = prior.assignment()
+        # New targets: one FULL tile becomes OUTER, one OUTER tile becomes FULL.
+        full = assignment.index(5)
+        outer = assignment.index(4)
+        contrib = [tile.contributions() for tile in prior.tiles]
+        new_targets = [targets[c] + contrib[full][4][c] - contrib[outer][4][c] for c in range(4)]
+        solution = repair_search(tiles, new_targets, tile_count, total, prior, max_changes=3)
+        self.assertIsNotNone(solution)
+        self.assertTrue(solution.final_check())
+        self.assertLessEqual(len(solution.changed), 2)
+        self.assertEqual(repair_search(tiles, targets, tile_count, total, prior).changed, [])
+
+    def test_repair_gives_up(self):
+        tiles = [['1'] * 16, [' '] * 16]
+        self.assertIsNone(repair_search(tiles, [5, 0, 0, 0], [1, 0, 1], 2, ["FULL", "FULL"]))
+
+##############################################
+# Test for solution counting and enumeration
+##############################################
+class TestSolutionCounter(unittest.TestCase):
+    def brute_force(self, tiles, targets, tile_count):
+        contrib = [Tile(value, Layouts.getInitialLayout(), "FULL").contributions() for value in tiles]
+        solutions = set()
+        for assignment in itertools.product(range(6), repeat=len(tiles)):
+            layouts = [0, 0, 0]
+            for option in assignment:
+                layouts[Layouts.getCategory(option)] += 1
+            colors = [sum(contrib[i][o][c] for i, o in enumerate(assignment)) for c in range(4)]
+            if layouts == tile_count and colors == targets:
+                solutions.add(tuple(Layouts.OPTION_NAMES[o] for o in assignment))
+        return solutions
+
+    def test_matches_brute_force(self):
+        tiles, targets, tile_count, total = make_problem(3, [1, 1, 1], seed=1)
+        # Two empty tiles and a copy of the first one make classes with several members.
+        tiles = tiles + [[' '] * 16, [' '] * 16, list(tiles[0])]
+        tile_count = [2, 2, 2]
+        targets = [sum(x) for x in zip(*(Tile(tiles[i], Layouts.getInitialLayout(), "FULL").contributions()[o]
+                                         for i, o in enumerate([4, 0, 5, 4, 5, 2])))]
+        expected = self.brute_force(tiles, targets, tile_count)
+        self.assertEqual(count_solutions(tiles, targets, tile_count, 6), len(expected))
+        solutions = [tuple(s) for s in iter_solutions(tiles, targets, tile_count, 6)]
+        self.assertEqual(len(solutions), len(set(solutions)))
+        self.assertEqual(set(solutions), expected)
+
+    def test_distinct_classes(self):
+        tiles = [[' '] * 16, [' '] * 16, ['1'] * 16]
+        # The OUTER tile is one of the empty tiles, the bush tile is FULL: one solution up to
+        # swapping the empty tiles, two per-tile ones.
+        self.assertEqual(count_solutions(tiles, [0, 0, 0, 0], [1, 0, 2], 3), 2)
+        self.assertEqual(count_solutions(tiles, [0, 0, 0, 0], [1, 0, 2], 3, distinct="classes"), 1)
+        solutions = list(iter_solutions(tiles, [0, 0, 0, 0], [1, 0, 2], 3, distinct="classes"))
+        self.assertEqual(len(solutions), 1)
+        self.assertEqual(solutions[0][2], "FULL")
+
+    def test_no_solution(self):
+        tiles = [['1'] * 16, [' '] * 16]
+        self.assertEqual(count_solutions(tiles, [5, 0, 0, 0], [1, 0, 1], 2), 0)
+        self.assertEqual(list(iter_solutions(tiles, [5, 0, 0, 0], [1, 0, 1], 2)), [])
+        self.assertEqual(count_solutions(tiles, [4, 0, 0, 0], [1, 0, 0], 2), 0)
+
+    def test_streams_lazily(self):
+        tiles, targets, tile_count, total = make_problem(25, [6, 11, 8], seed=2)
+        first = next(iter_solutions(tiles, targets, tile_count, total))
+        node = Node.from_assignment([Tile(tiles[i], Layouts.getInitialLayout(), "FULL") for i in range(total)],
+                                    targets, tile_count, [Layouts.OPTION_INDEX[name] for name in first])
+        self.assertTrue(node.final_check())
+
+##############################################
+# Test for the beam search
+##############################################
+class TestBeamSearch(unittest.TestCase):
+    def test_finds_outer(self):
+        # Only an OUTER layout on the bush tile uncovers its four centre bushes.
+        tiles = [['1'] * 16, [' '] * 16]
+        node = beam_layers(tiles, [4, 0, 0, 0], [1, 0, 1], 2, beam_width=3)
+        self.assertIsNotNone(node)
+        self.assertEqual([tile.layoutName for tile in node.tiles], ["OUTER", "FULL"])
+
+    def test_unsatisfiable(self):
+        tiles = [['1'] * 16, [' '] * 16]
+        self.assertIsNone(beam_layers(tiles, [5, 0, 0, 0], [1, 0, 1], 2, beam_width=3))
+
+    def test_sample_input_widening(self):
+        fr = FileReader()
+        fr.read_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "inputs", "input1"))
+        args = (fr.get_tiles(), fr.get_targets(), fr.get_tile_count(), fr.get_total_tiles())
+        # A beam of 5 is too narrow for input1, and widening only happens up to max_width.
+        self.assertIsNone(beam_solve(*args, beam_width=5))
+        solution = beam_solve(*args, beam_width=5, max_width=20)
+        self.assertIsNotNone(solution)
+        self.assertTrue(solution.final_check())
+
+##############################################
+# Test for FileReader.read_text and the solver daemon
+##############################################
+# Two tiles side by side: all '1' bushes, then an empty tile.
+INLINE_PROBLEM = "\n".join(["1 1 1 1         "] * 4 + [
+    "{OUTER_BOUNDARY=1, EL_SHAPE=0, FULL_BLOCK=1}",
+    "1:4", "2:0", "3:0", "4:0"])
+
+class TestSolverDaemon(unittest.TestCase):
+    def test_read_text(self):
+        fr = FileReader()
+        fr.read_text(INLINE_PROBLEM)
+        self.assertEqual(fr.get_tile_count(), [1, 0, 1])
+        self.assertEqual(fr.get_targets(), [4, 0, 0, 0])
+        self.assertEqual(fr.get_tiles(), [['1'] * 16, [' '] * 16])
+
+    def test_solve_request(self):
+        result = solve_request({"text": INLINE_PROBLEM})
+        self.assertEqual(result["status"], "solved")
+        self.assertEqual(result["assignment"], ["OUTER", "FULL"])
+        self.assertEqual(result["color_count"], [4, 0, 0, 0])
+        self.assertEqual(solve_request({"text": INLINE_PROBLEM, "mode": "nope"})["status"], "error")
+        self.assertEqual(solve_request({"file": "no/such/file"})["status"], "error")
+        self.assertEqual(solve_request({})["status"], "error")
+
+    def test_time_limit(self):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inputs", "input10")
+        result = solve_request({"file": path, "time_limit": 0.5})
+        self.assertEqual(result["status"], "timeout")
+        self.assertEqual(solve_request({"text": INLINE_PROBLEM}, time_limit=5)["status"], "solved")
+
+    def test_handle_line(self):
+        daemon = SolverDaemon(workers=1)
+        try:
+            line = json.dumps({"id": 7, "text": INLINE_PROBLEM, "mode": "local", "seed": 1})
+            result = json.loads(asyncio.run(daemon.handle_line(line)))
+            self.assertEqual(result["id"], 7)
+            self.assertEqual(result["status"], "solved")
+            result = json.loads(asyncio.run(daemon.handle_line("not json")))
+            self.assertEqual(result["status"], "error")
+        finally:
+            daemon.close()
+
+    def test_serve_unix_keeps_other_files(self):
+        daemon = SolverDaemon(workers=1)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "not_a_socket")
+                with open(path, 'w') as f:
+                    f.write("keep me")
+                with self.assertRaises(FileExistsError):
+                    asyncio.run(daemon.serve_unix(path))
+                with open(path) as f:
+                    self.assertEqual(f.read(), "keep me")
+        finally:
+            daemon.close()
+
+    def test_broken_worker(self):
+        daemon = SolverDaemon(workers=1)
+        try:
+            # Kill the only worker; the pool is broken until the daemon replaces it.
+            daemon.executor.submit(os._exit, 1)
+            line = json.dumps({"id": 3, "text": INLINE_PROBLEM})
+            result = json.loads(asyncio.run(daemon.handle_line(line)))
+            self.assertEqual(result["id"], 3)
+            self.assertEqual(result["status"], "error")
+            result = json.loads(asyncio.run(daemon.handle_line(line)))
+            self.assertEqual(result["status"], "solved")
+        finally:
+            daemon.close()
+
 ##############################################
 # Run all tests
 ##############################################